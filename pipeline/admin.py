@@ -1,8 +1,14 @@
  
+import os
+
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from .models import (
     Task, Vendor, Timeline, Subtask, 
-    CapabilityMapping, FinalAnalysis, ValidationLog
+    CapabilityMapping, FinalAnalysis, ValidationLog, IdempotencyKey, PhaseProfile, TaskArchive, FeedCache, UrlCheck
 )
 
 @admin.register(Task)
@@ -39,4 +45,67 @@ class FinalAnalysisAdmin(admin.ModelAdmin):
 @admin.register(ValidationLog)
 class ValidationLogAdmin(admin.ModelAdmin):
     list_display = ('task', 'phase', 'status', 'created_at')
-    list_filter = ('phase', 'status')
\ No newline at end of file
+    list_filter = ('phase', 'status')
+
+@admin.register(TaskArchive)
+class TaskArchiveAdmin(admin.ModelAdmin):
+    list_display = ('task_id', 'user_id', 'status', 'task_created_at', 'archived_at', 'payload_size')
+    search_fields = ('task_id', 'user_id')
+    exclude = ('payload',)
+    readonly_fields = ('task_id', 'user_id', 'status', 'task_created_at', 'archived_at', 'payload_size')
+
+@admin.register(FeedCache)
+class FeedCacheAdmin(admin.ModelAdmin):
+    list_display = ('url', 'status_code', 'entry_count', 'fetched_at', 'checked_at')
+    search_fields = ('url',)
+    readonly_fields = ('etag', 'last_modified', 'status_code', 'error', 'fetched_at', 'checked_at')
+    exclude = ('entries',)
+
+    @admin.display(description='Entries')
+    def entry_count(self, obj):
+        return len(obj.entries or [])
+
+@admin.register(UrlCheck)
+class UrlCheckAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'reachable', 'status_code', 'reason', 'checked_at', 'expires_at')
+    list_filter = ('kind', 'reachable')
+    search_fields = ('key',)
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'scope', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('key', 'scope')
+
+@admin.register(PhaseProfile)
+class PhaseProfileAdmin(admin.ModelAdmin):
+    list_display = ('task', 'phase', 'engine', 'duration', 'peak_memory', 'created_at', 'download_link')
+    list_filter = ('phase', 'engine')
+    search_fields = ('task__id',)
+    readonly_fields = ('task', 'phase', 'engine', 'artifact', 'duration', 'peak_memory',
+                       'created_at', 'download_link', 'summary_text')
+    exclude = ('summary',)
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view),
+                 name='pipeline_phaseprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(PhaseProfile, pk=pk)
+        if not profile.artifact or not profile.artifact.storage.exists(profile.artifact.name):
+            raise Http404("Profile artifact is missing")
+        return FileResponse(profile.artifact.open('rb'), as_attachment=True,
+                            filename=os.path.basename(profile.artifact.name))
+
+    @admin.display(description='Artifact')
+    def download_link(self, obj):
+        if not obj.pk or not obj.artifact:
+            return '-'
+        url = reverse('admin:pipeline_phaseprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">Download</a>', url)
+
+    @admin.display(description='Summary')
+    def summary_text(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.summary)
@@ -9,7 +9,18 @@ class PipelineConfig(AppConfig):
     name = 'pipeline'
 
     def ready(self):
+        from django.conf import settings
+        if getattr(settings, 'LOG_ASYNC', False):
+            from vendor_pipeline.log_handlers import install_queue_logging
+            install_queue_logging()
+
         logger.info("[OK] Pipeline app ready with LLM service initialized")
+        from pipeline.services.tracing import configure_tracing
+        configure_tracing()
+
+        from django.db.backends.signals import connection_created
+        from pipeline.services.query_profiler import install_execute_wrapper
+        connection_created.connect(install_execute_wrapper, dispatch_uid='pipeline_query_profiler')
         try:
             from pipeline.services.llm_service import llm_service
             if llm_service:
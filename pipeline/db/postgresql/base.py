@@ -0,0 +1,138 @@
+"""
+PostgreSQL backend that hands connections back to a per-process pool.
+
+Closing a Django connection (end of request, end of phase) returns the
+underlying psycopg connection to a bounded pool instead of disconnecting,
+so short-lived phase threads reuse connections and a process never holds
+more than POOL['max_size'] of them. Idle connections are reused LIFO and
+dropped after POOL['max_idle'] seconds. Set CONN_MAX_AGE to 0 with this
+backend so connections go back to the pool as soon as Django is done.
+"""
+
+import logging
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL = {
+    'max_size': 10,     # open connections per process, idle + checked out
+    'timeout': 30,      # seconds to wait for a free connection
+    'max_idle': 300,    # seconds before an idle connection is closed
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Bounded pool: a semaphore caps checked-out connections, idle ones are a LIFO stack"""
+
+    def __init__(self, alias, max_size, timeout, max_idle):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def checkout(self, connect):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f"Connection pool '{self.alias}' exhausted: {self.max_size} connections in use "
+                f"for {self.timeout}s"
+            )
+        try:
+            conn = self._pop_idle()
+            return conn if conn is not None else connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def checkin(self, conn):
+        try:
+            if not conn.closed and conn.info.transaction_status != 0:
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"[DB POOL] Discarding connection that failed to reset: {e}")
+            self._discard(conn)
+        else:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _pop_idle(self):
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            # Oldest entries sit at the bottom of the stack
+            while self._idle and now - self._idle[0][1] > self.max_idle:
+                stale.append(self._idle.pop(0)[0])
+            while self._idle and conn is None:
+                candidate = self._idle.pop()[0]
+                if candidate.closed:
+                    continue
+                conn = candidate
+        for old in stale:
+            self._discard(old)
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {'idle': idle, 'max_size': self.max_size}
+
+
+def get_pool(alias, settings_dict):
+    # Keyed by target as well as alias: Django briefly connects to the
+    # 'postgres' database under the same alias when NAME is unavailable
+    key = (alias, settings_dict['NAME'], settings_dict['USER'], settings_dict['HOST'], settings_dict['PORT'])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**DEFAULT_POOL, **settings_dict.get('POOL', {})}
+            pool = ConnectionPool(alias, int(options['max_size']), float(options['timeout']),
+                                  float(options['max_idle']))
+            _pools[key] = pool
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        conn = self.pool.checkout(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Normally set while connecting; a reused connection skips that step
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return conn
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.checkin(self.connection)
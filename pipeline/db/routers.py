@@ -0,0 +1,64 @@
+import contextvars
+import time
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+PIN_SESSION_KEY = 'primary_pins'
+
+# Alias used for reads in the current request; None means the default database
+_read_alias = contextvars.ContextVar('read_db_alias', default=None)
+
+
+def replica_configured() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def route_reads(alias: str):
+    """Send ORM reads in the current context to `alias`; returns a token for reset_reads()"""
+    return _read_alias.set(alias)
+
+
+def reset_reads(token):
+    _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Reads go to the replica only inside route_reads(); writes and migrations stay on default"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+def _active_pins(request) -> dict:
+    now = time.time()
+    pins = request.session.get(PIN_SESSION_KEY, {})
+    return {task_id: until for task_id, until in pins.items() if until > now}
+
+
+def pin_to_primary(request, task_ids):
+    """Read these tasks from the primary for this session until the replica has caught up"""
+    if not replica_configured():
+        return
+    pins = _active_pins(request)
+    until = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 30)
+    for task_id in task_ids:
+        pins[str(task_id)] = until
+    request.session[PIN_SESSION_KEY] = pins
+
+
+def is_pinned(request, task_id=None) -> bool:
+    """True if the session wrote `task_id` recently, or any task when `task_id` is None"""
+    pins = _active_pins(request)
+    if task_id is None:
+        return bool(pins)
+    return str(task_id) in pins
@@ -0,0 +1,162 @@
+"""
+SQLite backend tuned for several pipeline threads sharing one database file.
+
+Each new connection applies the PRAGMAS from the database settings (WAL,
+synchronous=NORMAL, busy_timeout, cache_size, mmap_size). Writers queue up
+behind a process-wide lock instead of failing with "database is locked":
+
+- `atomic()` opens no transaction until its block first writes. Reads before
+  that run in autocommit, so read-only blocks never wait on writers; the
+  first write takes the lock and starts the transaction with BEGIN
+  IMMEDIATE, replaying any savepoints the block created meanwhile.
+- Write statements run in autocommit mode (`save()`, `update()` outside
+  `atomic()`) take the lock for their duration.
+
+Reads ahead of a block's first write therefore see the latest committed
+data, as under PostgreSQL's READ COMMITTED, rather than one snapshot. A
+deferred BEGIN would keep the snapshot but fail with "database is locked"
+when a block that read first tries to write after another commit.
+"""
+
+import logging
+import re
+import threading
+
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,       # negative = KiB, i.e. 64 MB
+    'mmap_size': 268435456,     # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Shared by every connection in this process
+_writer_lock = threading.RLock()
+
+_WRITE_RE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_SAVEPOINT_RE = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\s+(\S+)\s*$", re.IGNORECASE)
+
+
+def _acquire_writer_lock(timeout: float) -> bool:
+    # Wait a little longer than SQLite would, then let SQLite's own
+    # busy handler have the final say rather than block forever
+    if _writer_lock.acquire(timeout=timeout):
+        return True
+    logger.warning(f"[SQLITE] Writer lock not acquired after {timeout:.1f}s; writing anyway")
+    return False
+
+
+class CursorWrapper(base.SQLiteCursorWrapper):
+    """Runs write statements behind the writer lock and starts deferred transactions"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.db = None  # set by DatabaseWrapper.create_cursor
+
+    def _run(self, run, query, *args):
+        write = bool(_WRITE_RE.match(query))
+        if self.db.transaction_pending:
+            savepoint = _SAVEPOINT_RE.match(query)
+            if savepoint:
+                self.db._defer_savepoint(savepoint.group(1).upper(), savepoint.group(2))
+                return self
+            if not write:
+                return run(query, *args)
+            self.db._begin_transaction()
+        if not write or self.connection.in_transaction:
+            # An open transaction already holds the lock
+            return run(query, *args)
+        locked = _acquire_writer_lock(self.db.writer_lock_timeout)
+        try:
+            return run(query, *args)
+        finally:
+            if locked:
+                _writer_lock.release()
+
+    def execute(self, query, params=None):
+        return self._run(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._run(super().executemany, query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._holds_writer_lock = False
+        self.transaction_pending = False
+        self._pending_savepoints = []
+
+    @property
+    def pragmas(self):
+        return {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+
+    @property
+    def writer_lock_timeout(self) -> float:
+        return self.pragmas['busy_timeout'] / 1000 * 2
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=CursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        # BEGIN IMMEDIATE is sent with the block's first write; see CursorWrapper
+        self.transaction_pending = True
+
+    def _defer_savepoint(self, command, sid):
+        if command == 'SAVEPOINT':
+            self._pending_savepoints.append(sid)
+        elif sid in self._pending_savepoints:
+            # ROLLBACK TO keeps the savepoint itself; RELEASE drops it too
+            index = self._pending_savepoints.index(sid)
+            del self._pending_savepoints[index + (command != 'RELEASE SAVEPOINT'):]
+
+    def _begin_transaction(self):
+        self._holds_writer_lock = _acquire_writer_lock(self.writer_lock_timeout)
+        savepoints, self._pending_savepoints = self._pending_savepoints, []
+        self.transaction_pending = False
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for sid in savepoints:
+                self.connection.execute(f"SAVEPOINT {sid}")
+        except Exception:
+            self._release_writer_lock()
+            raise
+
+    def _release_writer_lock(self):
+        self.transaction_pending = False
+        self._pending_savepoints = []
+        if self._holds_writer_lock:
+            self._holds_writer_lock = False
+            _writer_lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_writer_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_writer_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_writer_lock()
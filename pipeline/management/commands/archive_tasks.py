@@ -0,0 +1,62 @@
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pipeline.services.archiver import archivable_tasks, archive_batch, DEFAULT_BATCH_SIZE
+
+_DURATION_RE = re.compile(r'^(\d+)([dhw]?)$')
+_UNITS = {'': 'days', 'd': 'days', 'h': 'hours', 'w': 'weeks'}
+
+
+def parse_age(value: str) -> timedelta:
+    match = _DURATION_RE.match(value.strip().lower())
+    if not match:
+        raise CommandError(f"Invalid --older-than '{value}'; use e.g. 90, 90d, 12w or 48h")
+    amount, unit = match.groups()
+    return timedelta(**{_UNITS[unit]: int(amount)})
+
+
+class Command(BaseCommand):
+    help = ("Move old tasks and all their child rows into compressed TaskArchive rows, "
+            "deleting them from the live tables in small batches")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', required=True,
+                            help="Age since the task was last updated: 90 / 90d (days), 12w, 48h")
+        parser.add_argument('--status', default='completed',
+                            help="Only archive tasks with this status (default: completed)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Tasks archived and deleted per transaction")
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help="Seconds to sleep between batches so other writers get the locks")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Stop after this many tasks")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many tasks would be archived")
+
+    def handle(self, *args, older_than, status, batch_size, pause, limit, dry_run, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        age = parse_age(older_than)
+        candidates = archivable_tasks(age, status=status)
+
+        if dry_run:
+            self.stdout.write(f"{candidates.count()} {status} tasks older than {older_than} would be archived")
+            return
+
+        total = 0
+        last_id = 0
+        while limit is None or total < limit:
+            size = batch_size if limit is None else min(batch_size, limit - total)
+            ids = list(candidates.filter(id__gt=last_id).values_list('id', flat=True)[:size])
+            if not ids:
+                break
+            total += archive_batch(ids, age, status=status)
+            last_id = ids[-1]
+            self.stdout.write(f"Archived {total} tasks (up to id {last_id})")
+            if pause:
+                time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(f"Done: archived {total} {status} tasks older than {older_than}"))
@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pipeline.models import Task, Vendor, Subtask
+
+ROWS_PER_TASK = 10
+INSERT_BATCH = 5000
+STATUSES = ['pending', 'phase1_done', 'phase4_done', 'completed', 'error']
+
+
+class Command(BaseCommand):
+    help = ("Grow the vendor/subtask tables to each size and time the pipeline's hot lookups, "
+            "to check they stay flat as tables grow. Runs in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help="Comma-separated vendor (and subtask) row counts to measure at")
+        parser.add_argument('--lookups', type=int, default=200,
+                            help="Timed lookups per query and size")
+        parser.add_argument('--explain', action='store_true',
+                            help="Print the query plans at the largest size")
+        parser.add_argument('--keep', action='store_true',
+                            help="Commit the generated rows instead of rolling back")
+
+    def handle(self, *args, sizes, lookups, explain, keep, **options):
+        try:
+            targets = sorted(int(s) for s in sizes.split(',') if s.strip())
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+        if not targets or targets[0] < ROWS_PER_TASK or lookups < 1:
+            raise CommandError(f"sizes must be at least {ROWS_PER_TASK} and --lookups positive")
+
+        self.stdout.write(f"{'rows':>10}  {'query':<22}{'median us':>10}{'p95 us':>10}")
+        with transaction.atomic():
+            task_ids = []
+            for target in targets:
+                self._grow(task_ids, target)
+                for name, query in self._queries(task_ids):
+                    timings = self._time(query, lookups)
+                    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+                    self.stdout.write(f"{target:>10}  {name:<22}{statistics.median(timings):>10.0f}{p95:>10.0f}")
+            if explain:
+                for name, query in self._queries(task_ids):
+                    self.stdout.write(f"\n-- {name}\n{query(explain=True)}")
+            if not keep:
+                transaction.set_rollback(True)
+
+    def _grow(self, task_ids, target):
+        """Insert tasks with ROWS_PER_TASK vendors and subtasks each until `target` vendor rows exist"""
+        existing = len(task_ids) * ROWS_PER_TASK
+        while existing < target:
+            count = min(INSERT_BATCH // ROWS_PER_TASK, (target - existing) // ROWS_PER_TASK) or 1
+            start = len(task_ids)
+            tasks = Task.objects.bulk_create([
+                Task(user_id=f"bench-user-{(start + i) % 1000}", task_description="bench",
+                     status=STATUSES[(start + i) % len(STATUSES)])
+                for i in range(count)
+            ])
+            new_ids = [t.id for t in tasks]
+            Vendor.objects.bulk_create([
+                Vendor(task_id=tid, vendor_name=f"bench-vendor-{n}")
+                for tid in new_ids for n in range(ROWS_PER_TASK)
+            ], batch_size=INSERT_BATCH)
+            Subtask.objects.bulk_create([
+                Subtask(task_id=tid, subtask_name=f"bench-subtask-{n}", description='',
+                        time_percent=10, importance=0.5, ai_applicable='yes')
+                for tid in new_ids for n in range(ROWS_PER_TASK)
+            ], batch_size=INSERT_BATCH)
+            task_ids.extend(new_ids)
+            existing += count * ROWS_PER_TASK
+
+    def _queries(self, task_ids):
+        def vendor_upsert(explain=False):
+            qs = Vendor.objects.filter(task_id=random.choice(task_ids),
+                                       vendor_name=f"bench-vendor-{random.randrange(ROWS_PER_TASK)}")
+            return qs.explain() if explain else qs.get()
+
+        def subtask_upsert(explain=False):
+            qs = Subtask.objects.filter(task_id=random.choice(task_ids),
+                                        subtask_name=f"bench-subtask-{random.randrange(ROWS_PER_TASK)}")
+            return qs.explain() if explain else qs.get()
+
+        def tasks_by_status(explain=False):
+            qs = Task.objects.filter(status=random.choice(STATUSES)).order_by('-created_at')[:20]
+            return qs.explain() if explain else list(qs)
+
+        def tasks_by_user(explain=False):
+            qs = Task.objects.filter(user_id=f"bench-user-{random.randrange(1000)}").order_by('-created_at')[:20]
+            return qs.explain() if explain else list(qs)
+
+        return [
+            ('vendor (task, name)', vendor_upsert),
+            ('subtask (task, name)', subtask_upsert),
+            ('tasks by status', tasks_by_status),
+            ('tasks by user', tasks_by_user),
+        ]
+
+    def _time(self, query, lookups):
+        timings = []
+        for _ in range(lookups):
+            start = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        timings.sort()
+        return timings
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pipeline.services.exporter import stream_export, EXPORT_FORMATS, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Stream all tasks with their vendors, capability mappings and final analyses to a file or stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='fmt', default='ndjson', choices=EXPORT_FORMATS,
+                            help="Output format (parquet requires pyarrow)")
+        parser.add_argument('--output', '-o', default='-',
+                            help="Destination file path, '-' for stdout (default)")
+        parser.add_argument('--status', default=None,
+                            help="Only export tasks with this status, e.g. 'completed'")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Tasks fetched per database round trip / Parquet row group")
+
+    def handle(self, *args, fmt, output, status, chunk_size, **options):
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        binary = fmt == 'parquet'
+        if output == '-':
+            out = sys.stdout.buffer if binary else sys.stdout
+            close = False
+        else:
+            out = open(output, 'wb' if binary else 'w', newline=None if binary else '')
+            close = True
+
+        try:
+            for chunk in stream_export(fmt, status=status, chunk_size=chunk_size):
+                out.write(chunk)
+            out.flush()
+        finally:
+            if close:
+                out.close()
+
+        if output != '-':
+            self.stderr.write(self.style.SUCCESS(f"Exported {fmt} to {output}"))
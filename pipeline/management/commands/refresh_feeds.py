@@ -0,0 +1,18 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from pipeline.services.vendor_collector import collector
+
+
+class Command(BaseCommand):
+    help = "Refresh the vendor feed cache (conditional GETs; run from cron to keep phase 1 off the network)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Re-request every feed even if it was checked within the TTL")
+
+    def handle(self, *args, force, **options):
+        results = asyncio.run(collector.refresh_feeds(force=force))
+        for url, result in results.items():
+            self.stdout.write(f"{result:<13} {url}")
@@ -0,0 +1,54 @@
+import logging
+
+from django.conf import settings
+
+from pipeline.services import query_profiler, tracing
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """Open a server span around each request so phase and LLM spans nest under it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracing.span('http.request', **{
+            'http.method': request.method,
+            'http.target': request.path,
+        }) as current:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            route = match.route if match else request.path
+            tracing.set_attributes(current, **{
+                'http.route': route,
+                'http.status_code': response.status_code,
+            })
+            if current is not None:
+                current.update_name(f"{request.method} {match.view_name if match else route}")
+            return response
+
+
+class QueryProfilerMiddleware:
+    """Log query count and DB time per request; check QUERY_BUDGETS by URL name.
+
+    Streaming responses are counted until their body has been sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not query_profiler.is_enabled():
+            return self.get_response(request)
+
+        with query_profiler.profile_queries(f"{request.method} {request.path}") as profile:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            if match and match.url_name:
+                profile.budget = getattr(settings, 'QUERY_BUDGETS', {}).get(match.url_name)
+            if response.streaming:
+                # Exports query while the body streams, after this block exits
+                response.streaming_content = query_profiler.profile_stream(profile, response.streaming_content)
+        return response
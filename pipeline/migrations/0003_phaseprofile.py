@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 05:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhaseProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phase', models.CharField(max_length=50)),
+                ('engine', models.CharField(choices=[('cprofile', 'cProfile'), ('pyinstrument', 'pyinstrument')], max_length=20)),
+                ('artifact', models.FileField(upload_to='profiles/')),
+                ('summary', models.TextField(blank=True)),
+                ('duration', models.FloatField()),
+                ('peak_memory', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='pipeline.task')),
+            ],
+            options={
+                'db_table': 'phase_profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
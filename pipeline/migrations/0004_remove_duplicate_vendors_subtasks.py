@@ -0,0 +1,66 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def _move_children(model, field, extra_ids, keep_id, unique_with):
+    """Point `model` rows at `keep_id` instead of the duplicates in `extra_ids`.
+
+    Rows whose `unique_with` values the kept parent already has (or gets
+    from an older duplicate) would collide; they stay behind and are
+    deleted with their duplicate.
+    """
+    taken = set(model.objects.filter(**{f'{field}_id': keep_id}).values_list(*unique_with))
+    for row in model.objects.filter(**{f'{field}_id__in': extra_ids}).order_by('id'):
+        key = tuple(getattr(row, name) for name in unique_with)
+        if key in taken:
+            continue
+        taken.add(key)
+        model.objects.filter(pk=row.pk).update(**{f'{field}_id': keep_id})
+
+
+def remove_duplicates(apps, schema_editor):
+    """Keep the oldest row per (task, vendor_name) / (task, subtask_name).
+
+    Duplicates can exist from concurrent update_or_create calls. Final
+    analyses, timelines and capability mappings of a removed row are moved
+    to the kept one first; only those that would collide with a row the kept
+    one already has are deleted with the duplicate.
+    """
+    Vendor = apps.get_model('pipeline', 'Vendor')
+    Subtask = apps.get_model('pipeline', 'Subtask')
+    FinalAnalysis = apps.get_model('pipeline', 'FinalAnalysis')
+    Timeline = apps.get_model('pipeline', 'Timeline')
+    CapabilityMapping = apps.get_model('pipeline', 'CapabilityMapping')
+
+    dupes = (Vendor.objects.values('task_id', 'vendor_name')
+             .annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1))
+    for row in dupes.iterator():
+        extra = Vendor.objects.filter(task_id=row['task_id'], vendor_name=row['vendor_name']).exclude(id=row['keep'])
+        extra_ids = list(extra.values_list('id', flat=True))
+        FinalAnalysis.objects.filter(best_vendor_id__in=extra_ids).update(best_vendor_id=row['keep'])
+        _move_children(Timeline, 'vendor', extra_ids, row['keep'], ('phase', 'year'))
+        _move_children(CapabilityMapping, 'vendor', extra_ids, row['keep'], ('subtask_id',))
+        extra.delete()
+
+    dupes = (Subtask.objects.values('task_id', 'subtask_name')
+             .annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1))
+    for row in dupes.iterator():
+        extra = Subtask.objects.filter(
+            task_id=row['task_id'], subtask_name=row['subtask_name']
+        ).exclude(id=row['keep'])
+        _move_children(CapabilityMapping, 'subtask', list(extra.values_list('id', flat=True)), row['keep'],
+                       ('vendor_id',))
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+    # Kept apart from 0005 so the deletes commit before the constraints are
+    # built (PostgreSQL refuses ALTER TABLE with pending deferred FK checks).
+
+    dependencies = [
+        ('pipeline', '0003_phaseprofile'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0004_remove_duplicate_vendors_subtasks'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='subtask',
+            unique_together={('task', 'subtask_name')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='vendor',
+            unique_together={('task', 'vendor_name')},
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at'], name='tasks_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user_id', 'created_at'], name='tasks_user_created_idx'),
+        ),
+    ]
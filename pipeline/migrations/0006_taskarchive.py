@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0005_task_indexes_unique_vendor_subtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.IntegerField(unique=True)),
+                ('user_id', models.CharField(db_index=True, max_length=100)),
+                ('status', models.CharField(max_length=50)),
+                ('task_created_at', models.DateTimeField()),
+                ('payload', models.BinaryField()),
+                ('payload_size', models.IntegerField(help_text='Uncompressed JSON size in bytes')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'task_archives',
+                'ordering': ['-archived_at'],
+            },
+        ),
+    ]
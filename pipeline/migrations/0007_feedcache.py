@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0006_taskarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=100)),
+                ('entries', models.JSONField(default=list)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'feed_cache',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0007_feedcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrlCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=500, unique=True)),
+                ('kind', models.CharField(choices=[('url', 'URL'), ('domain', 'Domain')], max_length=10)),
+                ('reachable', models.BooleanField()),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, default='', max_length=100)),
+                ('checked_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'url_checks',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-19 06:08
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copy of pipeline.services.entity_resolution.canonical_name as of this
+# migration, so later changes to the live function don't change the backfill
+LEGAL_SUFFIXES = frozenset("""
+inc incorporated corp corporation co company ltd limited llc llp lp plc
+gmbh ag kg sa sas sarl srl spa bv nv oy ab as asa pty pvt kk
+""".split())
+
+
+def canonical_name(name):
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = text.casefold().replace('&', ' and ')
+    words, run = [], ''
+    for word in re.sub(r'[^a-z0-9]+', ' ', text).split():
+        if len(word) == 1:
+            run += word
+            continue
+        if run:
+            words.append(run)
+            run = ''
+        words.append(word)
+    if run:
+        words.append(run)
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def fill_canonical_names(apps, schema_editor):
+    """Backfill canonical_name so validation can match vendors stored before it existed"""
+    Vendor = apps.get_model('pipeline', 'Vendor')
+    names = Vendor.objects.filter(canonical_name='').values_list('vendor_name', flat=True).distinct()
+    for name in names.iterator():
+        Vendor.objects.filter(vendor_name=name, canonical_name='').update(canonical_name=canonical_name(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0008_url_check'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='canonical_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(fill_canonical_names, migrations.RunPython.noop),
+    ]
@@ -29,6 +29,10 @@ class Task(models.Model):
     class Meta:
         db_table = 'tasks'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='tasks_status_created_idx'),
+            models.Index(fields=['user_id', 'created_at'], name='tasks_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"Task {self.id}: {self.task_description[:50]}"
@@ -36,6 +40,8 @@ class Task(models.Model):
 class Vendor(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='vendors')
     vendor_name = models.CharField(max_length=255)
+    # Normalized name without legal suffixes; matches the same company across tasks
+    canonical_name = models.CharField(max_length=255, blank=True, default='', db_index=True)
     product_name = models.CharField(max_length=255, blank=True, null=True)
     evidence_url = models.URLField(blank=True, null=True)
     source = models.CharField(max_length=255, default='discovery')
@@ -48,6 +54,7 @@ class Vendor(models.Model):
     
     class Meta:
         db_table = 'vendors'
+        unique_together = ['task', 'vendor_name']
     
     def __str__(self):
         return self.vendor_name
@@ -80,6 +87,7 @@ class Subtask(models.Model):
     
     class Meta:
         db_table = 'subtasks'
+        unique_together = ['task', 'subtask_name']
     
     def __str__(self):
         return f"{self.task_id}: {self.subtask_name}"
@@ -132,4 +140,103 @@ class ValidationLog(models.Model):
         db_table = 'validation_logs'
     
     def __str__(self):
-        return f"{self.phase} - {self.status}"
\ No newline at end of file
+        return f"{self.phase} - {self.status}"
+
+class PhaseProfile(models.Model):
+    ENGINE_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('pyinstrument', 'pyinstrument'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='profiles')
+    phase = models.CharField(max_length=50)
+    engine = models.CharField(max_length=20, choices=ENGINE_CHOICES)
+    artifact = models.FileField(upload_to='profiles/')
+    summary = models.TextField(blank=True)
+    duration = models.FloatField()
+    peak_memory = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'phase_profiles'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Task {self.task_id} {self.phase} ({self.engine})"
+
+class TaskArchive(models.Model):
+    """A deleted task with all of its child rows, stored as gzip-compressed JSON"""
+    task_id = models.IntegerField(unique=True)
+    user_id = models.CharField(max_length=100, db_index=True)
+    status = models.CharField(max_length=50)
+    task_created_at = models.DateTimeField()
+    payload = models.BinaryField()
+    payload_size = models.IntegerField(help_text="Uncompressed JSON size in bytes")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'task_archives'
+        ordering = ['-archived_at']
+
+    def __str__(self):
+        return f"Archived task {self.task_id}"
+
+class FeedCache(models.Model):
+    """Parsed entries of one RSS/Atom feed plus the validators for conditional GETs"""
+    url = models.CharField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True, default='')
+    last_modified = models.CharField(max_length=100, blank=True, default='')
+    entries = models.JSONField(default=list)
+    status_code = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    fetched_at = models.DateTimeField(null=True, blank=True)    # last 200 response
+    checked_at = models.DateTimeField(null=True, blank=True)    # last request of any outcome
+
+    class Meta:
+        db_table = 'feed_cache'
+
+    def __str__(self):
+        return f"{self.url} ({len(self.entries)} entries)"
+
+class UrlCheck(models.Model):
+    """Cached reachability of an evidence URL or of a whole domain"""
+    KIND_CHOICES = [
+        ('url', 'URL'),
+        ('domain', 'Domain'),
+    ]
+
+    key = models.CharField(max_length=500, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    reachable = models.BooleanField()
+    status_code = models.IntegerField(null=True, blank=True)
+    reason = models.CharField(max_length=100, blank=True, default='')
+    checked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'url_checks'
+
+    def __str__(self):
+        return f"{self.key} - {'reachable' if self.reachable else 'unreachable'}"
+
+class IdempotencyKey(models.Model):
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        unique_together = ['key', 'scope']
+
+    def __str__(self):
+        return f"{self.scope} [{self.key}] - {self.status}"
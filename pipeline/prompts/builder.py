@@ -0,0 +1,117 @@
+import functools
+import json
+import logging
+
+from django.conf import settings
+
+from pipeline.prompts.template import Prompt
+from pipeline.services import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken  # type: ignore
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = ' ...[truncated]'
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding():
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    name = getattr(settings, 'PROMPT_TOKEN_ENCODING', 'cl100k_base')
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # Encodings are downloaded on first use; offline hosts fall back to the heuristic
+        logger.warning(f"[PROMPT] tiktoken encoding {name} unavailable ({e}); estimating tokens from length")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken, else about one per CHARS_PER_TOKEN characters"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut `text` to `max_tokens`, at a word boundary where possible, and mark the cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(max_tokens - count_tokens(TRUNCATION_MARKER), 0)
+    encoding = _encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+    else:
+        cut = text[:keep * CHARS_PER_TOKEN]
+    head, space, _tail = cut.rpartition(' ')
+    if space and len(head) > len(cut) // 2:
+        cut = head
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+def truncate_items(items: list, max_tokens: int) -> str:
+    """JSON array of the leading `items` that fit in `max_tokens`; always valid JSON"""
+    kept = []
+    used = count_tokens('[]')
+    for item in items:
+        cost = count_tokens(json.dumps(item)) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(item)
+        used += cost
+    return json.dumps(kept)
+
+
+def build_prompt(phase: str, template, **sections) -> str:
+    """Render `template(**sections)` with every section held to its token budget.
+
+    Budgets come from settings.PROMPT_SECTION_BUDGETS, keyed by the
+    template's argument name. String sections are cut at a word boundary;
+    list sections are rendered as JSON keeping whole items in order, so the
+    result stays parseable. Sections without a budget pass through. The
+    prompt's token count is logged and exported per phase; for template
+    prompts the log also shows the stable prefix, which only benefits from
+    provider caching at PROMPT_CACHE_MIN_TOKENS or more.
+    """
+    budgets = getattr(settings, 'PROMPT_SECTION_BUDGETS', {})
+    rendered = {}
+    sizes = {}
+    truncated = []
+    for name, value in sections.items():
+        budget = budgets.get(name)
+        if isinstance(value, (list, tuple)):
+            text = truncate_items(list(value), budget) if budget else json.dumps(list(value))
+            cut = budget is not None and len(json.loads(text)) < len(value)
+        else:
+            value = '' if value is None else str(value)
+            text = truncate_text(value, budget) if budget else value
+            cut = text != value
+        if cut:
+            truncated.append(name)
+            metrics.PROMPT_SECTIONS_TRUNCATED.labels(phase=phase, section=name).inc()
+        rendered[name] = text
+        sizes[name] = count_tokens(text)
+
+    prompt = template(**rendered)
+    total = count_tokens(prompt)
+    metrics.PROMPT_TOKENS.labels(phase=phase).observe(total)
+    breakdown = ' '.join(f"{name}={tokens}" for name, tokens in sizes.items())
+    prefix = ''
+    if isinstance(prompt, Prompt):
+        prompt.phase = phase
+        stable = count_tokens(prompt.stable_prefix)
+        cacheable = stable >= getattr(settings, 'PROMPT_CACHE_MIN_TOKENS', 1024)
+        prefix = f" stable_prefix={stable}{'' if cacheable else ' (below cache minimum)'}"
+    logger.info(f"[PROMPT] {phase} tokens={total}{prefix} ({breakdown})"
+                + (f" truncated={','.join(truncated)}" if truncated else ''))
+    return prompt
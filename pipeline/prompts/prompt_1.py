@@ -1,20 +1,11 @@
-def get_prompt_1(task_description: str, vendor_ctx: str = "") -> str:
-    """
-    PROMPT 1: VENDOR DISCOVERY (WITH VALIDATION)
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 1: VENDOR DISCOVERY FOR TASK AUTOMATION ===
-
-TASK TO ANALYZE: {task_description}
+from pipeline.prompts.template import PromptTemplate
 
----
-ADDITIONAL CONTEXT FROM REAL-WORLD SOURCES:
-{vendor_ctx}
----
+PROMPT_1 = PromptTemplate('prompt_1', instructions="""
+=== PROMPT 1: VENDOR DISCOVERY FOR TASK AUTOMATION ===
 
 You are a technical domain expert doing comprehensive vendor research.
 
-Your goal: Find ALL specific vendor solutions that automate or assist with this task.
+Your goal: Find ALL specific vendor solutions that automate or assist with the TASK TO ANALYZE given at the end, using the ADDITIONAL CONTEXT FROM REAL-WORLD SOURCES there where relevant.
 
 CRITICAL INSTRUCTIONS:
 
@@ -64,6 +55,22 @@ RULES:
 ❌ DON'T speculate: Use only official evidence links
 
 OUTPUT ONLY VALID JSON ARRAY (no markdown, no code blocks):
-[{{"vendor_company":"Company","product_name":"Product","capability":"Specific capability","what_it_replaces":"Manual work","evidence_link":"https://...","status":"commercial","domain":"specialized"}}]
+[{"vendor_company":"Company","product_name":"Product","capability":"Specific capability","what_it_replaces":"Manual work","evidence_link":"https://...","status":"commercial","domain":"specialized"}]
 
-Include at least 5-8 vendors/tools. Output ONLY valid JSON array."""
\ No newline at end of file
+Include at least 5-8 vendors/tools. Output ONLY valid JSON array.
+""", context="""
+TASK TO ANALYZE: {task_description}
+""", payload="""
+---
+ADDITIONAL CONTEXT FROM REAL-WORLD SOURCES:
+{vendor_ctx}
+---
+""")
+
+
+def get_prompt_1(task_description: str, vendor_ctx: str = "") -> str:
+    """
+    PROMPT 1: VENDOR DISCOVERY (WITH VALIDATION)
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_1.render(task_description=task_description, vendor_ctx=vendor_ctx)
@@ -1,16 +1,9 @@
- 
-def get_prompt_1a(vendor: str, product: str, task: str) -> str:
-    """
-    PROMPT 1A: PAST TIMELINE (2022-2023)
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 1A: PAST CAPABILITY ANALYSIS ===
+from pipeline.prompts.template import PromptTemplate
 
-VENDOR: {vendor}
-TOOL: {product}
-TASK: {task}
+PROMPT_1A = PromptTemplate('prompt_1a', instructions="""
+=== PROMPT 1A: PAST CAPABILITY ANALYSIS ===
 
----
+The VENDOR, TOOL and TASK are given at the end.
 
 Analyze what this tool could do for this task in 2022-2023 (PAST).
 
@@ -20,7 +13,7 @@ Research and answer:
    - YES / NO
    - If yes, what year was it first launched?
 
-2. What could it do for {task} back in 2022-2023?
+2. What could it do for the TASK back in 2022-2023?
    - Describe the capability level
    - What specific features existed?
    - What was it limited in?
@@ -39,10 +32,10 @@ Research and answer:
 
 OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
 
-{{
-  "vendor": "{vendor}",
-  "tool": "{product}",
-  "task": "{task}",
+{
+  "vendor": "VENDOR exactly as given",
+  "tool": "TOOL exactly as given",
+  "task": "TASK exactly as given",
   "timeline_phase": "PAST",
   "year_launched": 20XX or "unknown",
   "existed_in_2022": true/false,
@@ -50,6 +43,20 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
   "limitations_2023": "What it couldn't do or was limited in",
   "aps_score_2023": 0.X,
   "evidence_url": "link or N/A"
-}}
+}
+
+No markdown. Only JSON.
+""", context="""
+TASK: {task}
+""", payload="""
+VENDOR: {vendor}
+TOOL: {product}
+""")
 
-No markdown. Only JSON."""
+
+def get_prompt_1a(vendor: str, product: str, task: str) -> str:
+    """
+    PROMPT 1A: PAST TIMELINE (2022-2023)
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_1A.render(vendor=vendor, product=product, task=task)
@@ -1,18 +1,11 @@
- 
-def get_prompt_1b(vendor: str, product: str, task: str) -> str:
-    """
-    PROMPT 1B: PRESENT TIMELINE (2024-2025)
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 1B: PRESENT CAPABILITY ANALYSIS ===
+from pipeline.prompts.template import PromptTemplate
 
-VENDOR: {vendor}
-TOOL: {product}
-TASK: {task}
+PROMPT_1B = PromptTemplate('prompt_1b', instructions="""
+=== PROMPT 1B: PRESENT CAPABILITY ANALYSIS ===
 
----
+The VENDOR, TOOL and TASK are given at the end.
 
-Analyze what this tool can do RIGHT NOW (2024-2025) for {task}.
+Analyze what this tool can do RIGHT NOW (2024-2025) for the TASK.
 
 Research and answer:
 
@@ -20,7 +13,7 @@ Research and answer:
    - List recent feature releases
    - Check official blog and release notes
 
-2. What can it currently do for {task}?
+2. What can it currently do for the TASK?
    - Be specific about capabilities
    - What works well? What doesn't?
    - Any known limitations?
@@ -44,10 +37,10 @@ Research and answer:
 
 OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
 
-{{
-  "vendor": "{vendor}",
-  "tool": "{product}",
-  "task": "{task}",
+{
+  "vendor": "VENDOR exactly as given",
+  "tool": "TOOL exactly as given",
+  "task": "TASK exactly as given",
   "timeline_phase": "PRESENT",
   "latest_update_date": "YYYY-MM",
   "new_features_2024": ["Feature 1", "Feature 2", "Feature 3"],
@@ -58,6 +51,20 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
   "production_ready": true/false,
   "enterprise_customers": true/false,
   "latest_announcement_url": "https://..."
-}}
+}
+
+No markdown. Only JSON.
+""", context="""
+TASK: {task}
+""", payload="""
+VENDOR: {vendor}
+TOOL: {product}
+""")
 
-No markdown. Only JSON."""
+
+def get_prompt_1b(vendor: str, product: str, task: str) -> str:
+    """
+    PROMPT 1B: PRESENT TIMELINE (2024-2025)
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_1B.render(vendor=vendor, product=product, task=task)
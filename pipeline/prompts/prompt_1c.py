@@ -1,16 +1,9 @@
- 
-def get_prompt_1c(vendor: str, product: str, task: str) -> str:
-    """
-    PROMPT 1C: FUTURE TIMELINE (2025-2026)
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 1C: FUTURE CAPABILITY ANALYSIS ===
+from pipeline.prompts.template import PromptTemplate
 
-VENDOR: {vendor}
-TOOL: {product}
-TASK: {task}
+PROMPT_1C = PromptTemplate('prompt_1c', instructions="""
+=== PROMPT 1C: FUTURE CAPABILITY ANALYSIS ===
 
----
+The VENDOR, TOOL and TASK are given at the end.
 
 Analyze what this vendor has ANNOUNCED for the future (2025-2026).
 
@@ -20,7 +13,7 @@ Research and answer:
    - Check: Official roadmap page, investor presentations, CEO statements
    - List announced features/improvements
 
-2. What new capabilities might come for {task}?
+2. What new capabilities might come for the TASK?
    - How will it improve?
    - What problems will it solve?
    - Specific to this task?
@@ -40,10 +33,10 @@ Research and answer:
 
 OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
 
-{{
-  "vendor": "{vendor}",
-  "tool": "{product}",
-  "task": "{task}",
+{
+  "vendor": "VENDOR exactly as given",
+  "tool": "TOOL exactly as given",
+  "task": "TASK exactly as given",
   "timeline_phase": "FUTURE",
   "announced_features": ["Feature 1", "Feature 2"],
   "expected_timeline": "Q? 2025 or Uncertain",
@@ -52,6 +45,20 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
   "aps_score_expected": 0.X,
   "improvement_from_current": "+X%",
   "evidence_url": "https://..."
-}}
+}
+
+No markdown. Only JSON.
+""", context="""
+TASK: {task}
+""", payload="""
+VENDOR: {vendor}
+TOOL: {product}
+""")
 
-No markdown. Only JSON."""
+
+def get_prompt_1c(vendor: str, product: str, task: str) -> str:
+    """
+    PROMPT 1C: FUTURE TIMELINE (2025-2026)
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_1C.render(vendor=vendor, product=product, task=task)
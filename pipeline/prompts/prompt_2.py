@@ -1,16 +1,9 @@
- 
-def get_prompt_2(task_description: str) -> str:
-    """
-    PROMPT 2: SUBTASK DECOMPOSITION
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 2: SUBTASK DECOMPOSITION ===
-
-MAIN TASK: {task_description}
+from pipeline.prompts.template import PromptTemplate
 
----
+PROMPT_2 = PromptTemplate('prompt_2', instructions="""
+=== PROMPT 2: SUBTASK DECOMPOSITION ===
 
-Break this task into 5-8 specific subtasks.
+Break the MAIN TASK given at the end into 5-8 specific subtasks.
 
 For EACH subtask:
 
@@ -38,10 +31,10 @@ For EACH subtask:
 
 OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
 
-{{
-  "main_task": "{task_description}",
+{
+  "main_task": "MAIN TASK exactly as given",
   "subtasks": [
-    {{
+    {
       "id": 1,
       "subtask_name": "Name of subtask",
       "description": "What this subtask involves",
@@ -49,8 +42,19 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
       "importance": 0.X,
       "ai_applicable": "yes/no/partially",
       "why": "Explanation"
-    }}
+    }
   ]
-}}
+}
 
-Must have 5-8 subtasks. Time percents must sum to 100%. No markdown. Only JSON."""
+Must have 5-8 subtasks. Time percents must sum to 100%. No markdown. Only JSON.
+""", context="""
+MAIN TASK: {task_description}
+""")
+
+
+def get_prompt_2(task_description: str) -> str:
+    """
+    PROMPT 2: SUBTASK DECOMPOSITION
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_2.render(task_description=task_description)
@@ -1,21 +1,9 @@
-def get_prompt_3(task: str, vendors_json: str, subtasks_json: str) -> str:
-    """
-    PROMPT 3: CAPABILITY MAPPING WITH TIMELINE
-    FINAL PRODUCTION VERSION - Clean and simple
-    """
-    return f"""You are an expert at analyzing vendor capabilities.
-
-MAIN TASK: {task}
-
-VENDOR DATA:
-{vendors_json}
-
-SUBTASKS:
-{subtasks_json}
+from pipeline.prompts.template import PromptTemplate
 
----
+PROMPT_3 = PromptTemplate('prompt_3', instructions="""
+You are an expert at analyzing vendor capabilities.
 
-Create a comprehensive capability mapping analysis.
+Create a comprehensive capability mapping analysis for the MAIN TASK, SUBTASKS and VENDOR DATA given at the end.
 
 For EACH vendor/tool in the vendor data:
 1. Determine which subtasks it can handle (yes/no/partially)
@@ -33,47 +21,63 @@ CRITICAL INSTRUCTIONS:
 - End response with closing curly brace
 
 EXAMPLE OUTPUT:
-{chr(123)}
+{
   "capability_analysis": [
-    {chr(123)}
+    {
       "vendor": "TestRail, Inc.",
       "tool": "TestRail",
       "subtask_coverage": [
-        {chr(123)}
+        {
           "subtask": "Identify vendors",
           "can_handle": "yes",
           "aps_2024": 0.75,
           "aps_2025": 0.85,
           "aps_2026": 0.9
-        {chr(125)}
+        }
       ]
-    {chr(125)}
+    }
   ]
-{chr(125)}
+}
 
 RESPONSE FORMAT:
-{chr(123)}
+{
   "capability_analysis": [
-    {chr(123)}
+    {
       "vendor": "VENDOR_NAME",
       "tool": "TOOL_NAME",
       "subtask_coverage": [
-        {chr(123)}
+        {
           "subtask": "Subtask name",
           "can_handle": "yes/no/partially",
           "aps_2024": 0.X,
           "aps_2025": 0.X,
           "aps_2026": 0.X
-        {chr(125)}
+        }
       ]
-    {chr(125)}
+    }
   ]
-{chr(125)}
+}
 
 REQUIREMENTS:
 - "capability_analysis" MUST be an array with all vendors
 - Each vendor MUST have "vendor", "tool", and "subtask_coverage"
 - "subtask_coverage" MUST be an array of objects
 - All aps_* values MUST be decimals between 0.0 and 1.0
-- If unable to generate, return empty: {chr(123)}"capability_analysis": [{chr(125)}]
-"""
\ No newline at end of file
+- If unable to generate, return empty: {"capability_analysis": []}
+""", context="""
+MAIN TASK: {task}
+
+SUBTASKS:
+{subtasks_json}
+""", payload="""
+VENDOR DATA:
+{vendors_json}
+""")
+
+
+def get_prompt_3(task: str, vendors_json: str, subtasks_json: str) -> str:
+    """
+    PROMPT 3: CAPABILITY MAPPING WITH TIMELINE
+    FINAL PRODUCTION VERSION - Clean and simple
+    """
+    return PROMPT_3.render(task=task, vendors_json=vendors_json, subtasks_json=subtasks_json)
@@ -1,19 +1,9 @@
- 
-def get_prompt_4(task: str, capability_mapping_json: str) -> str:
-    """
-    PROMPT 4: FINAL APS & HRF CALCULATION
-    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
-    """
-    return f"""=== PROMPT 4: FINAL APS & HRF CALCULATION ===
-
-TASK: {task}
-
-CAPABILITY MAPPING:
-{capability_mapping_json}
+from pipeline.prompts.template import PromptTemplate
 
----
+PROMPT_4 = PromptTemplate('prompt_4', instructions="""
+=== PROMPT 4: FINAL APS & HRF CALCULATION ===
 
-Calculate final scores and generate recommendations.
+Calculate final scores and generate recommendations for the TASK and CAPABILITY MAPPING given at the end.
 
 For EACH vendor:
 
@@ -71,10 +61,10 @@ Final Analysis:
 
 OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
 
-{{
-  "task": "{task}",
+{
+  "task": "TASK exactly as given",
   "vendor_scores": [
-    {{
+    {
       "vendor": "VENDOR NAME",
       "tool": "TOOL NAME",
       "aps_2024": 0.X,
@@ -82,9 +72,9 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
       "adoption_rate": 0.X,
       "maturity": "alpha/beta/production",
       "production_ready": true/false
-    }}
+    }
   ],
-  "hrf_analysis": {{
+  "hrf_analysis": {
     "regulatory_requirement": 0.X,
     "trust_verification_needed": 0.X,
     "domain_expertise_required": 0.X,
@@ -92,8 +82,8 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
     "mission_criticality": 0.X,
     "weighted_hrf_total": 0.X,
     "interpretation": "X% human still required"
-  }},
-  "final_analysis": {{
+  },
+  "final_analysis": {
     "best_vendor_current": "VENDOR + TOOL",
     "best_vendor_aps_2024": 0.X,
     "best_vendor_aps_2025": 0.X,
@@ -104,7 +94,21 @@ OUTPUT ONLY THIS EXACT JSON (no markdown, no code blocks):
     "implementation_strategy": "Recommended approach",
     "tools_to_implement": ["Tool 1", "Tool 2"],
     "key_recommendations": "..."
-  }}
-}}
+  }
+}
 
-No markdown. Only JSON."""
+No markdown. Only JSON.
+""", context="""
+TASK: {task}
+""", payload="""
+CAPABILITY MAPPING:
+{capability_mapping_json}
+""")
+
+
+def get_prompt_4(task: str, capability_mapping_json: str) -> str:
+    """
+    PROMPT 4: FINAL APS & HRF CALCULATION
+    Follows PRODUCTION_READY_ALL_PROMPTS.md exactly
+    """
+    return PROMPT_4.render(task=task, capability_mapping_json=capability_mapping_json)
@@ -0,0 +1,64 @@
+SYSTEM_MESSAGE = "Output ONLY valid JSON. No markdown, no extra text."
+
+
+class Prompt(str):
+    """Rendered prompt text that remembers which part of it never changes.
+
+    `instructions` is identical for every call of a template and is sent in
+    the system message, so providers with prefix caching (Azure OpenAI
+    caches prompts from 1024 tokens on) can reuse it. `context` holds
+    inputs that stay fixed for a whole phase run (task, subtasks) and
+    `payload` the per-call data; both go in the user message in that order.
+    As a str it is the three parts joined, for logging and sizing.
+    """
+
+    def __new__(cls, instructions: str, context: str = '', payload: str = '', name: str = ''):
+        body = '\n\n'.join(part for part in (context, payload) if part)
+        prompt = super().__new__(cls, f"{instructions}\n\n{body}" if body else instructions)
+        prompt.instructions = instructions
+        prompt.context = context
+        prompt.payload = payload
+        prompt.body = body
+        prompt.name = name
+        prompt.phase = None
+        return prompt
+
+    @property
+    def stable_prefix(self) -> str:
+        """Everything before the per-call payload"""
+        return f"{self.instructions}\n\n{self.context}" if self.context else self.instructions
+
+
+class PromptTemplate:
+    """Static instructions plus `str.format` templates for the variable parts.
+
+    Keep every placeholder out of `instructions`; refer to the inputs by
+    their headings instead ("the MAIN TASK below").
+    """
+
+    def __init__(self, name: str, instructions: str, context: str = '', payload: str = ''):
+        self.name = name
+        self.instructions = instructions.strip()
+        self.context = context.strip()
+        self.payload = payload.strip()
+
+    def render(self, **values) -> Prompt:
+        return Prompt(
+            self.instructions,
+            context=self.context.format(**values),
+            payload=self.payload.format(**values),
+            name=self.name,
+        )
+
+
+def chat_messages(prompt) -> list:
+    """System/user messages for a prompt; plain strings keep the old single-user-message shape"""
+    if isinstance(prompt, Prompt):
+        return [
+            {"role": "system", "content": f"{SYSTEM_MESSAGE}\n\n{prompt.instructions}"},
+            {"role": "user", "content": prompt.body},
+        ]
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt},
+    ]
@@ -41,6 +41,11 @@ class FinalAnalysisSerializer(serializers.ModelSerializer):
         fields = ['id', 'best_vendor_name', 'automation_2024', 'automation_2025', 
                   'automation_2026', 'hrf_scores', 'rpi_score', 'recommendations']
 
+class ValidationLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ValidationLog
+        fields = ['id', 'task', 'phase', 'validation_type', 'status', 'details', 'created_at']
+
 class TaskSerializer(serializers.ModelSerializer):
     vendors = VendorSerializer(many=True, read_only=True)
     subtasks = SubtaskSerializer(many=True, read_only=True)
@@ -54,4 +59,15 @@ class TaskSerializer(serializers.ModelSerializer):
 class TaskCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = ['user_id', 'task_description']
\ No newline at end of file
+        fields = ['user_id', 'task_description']
+
+class TaskBatchSerializer(serializers.Serializer):
+    tasks = TaskCreateSerializer(many=True, allow_empty=False)
+    run_pipeline = serializers.BooleanField(default=False)
+
+    def validate_tasks(self, value):
+        from django.conf import settings
+        max_size = getattr(settings, 'TASK_BATCH_MAX_SIZE', 500)
+        if len(value) > max_size:
+            raise serializers.ValidationError(f"At most {max_size} tasks per batch")
+        return value
@@ -0,0 +1,127 @@
+import gzip
+import json
+import logging
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from pipeline.models import Task, Vendor, CapabilityMapping, PhaseProfile, TaskArchive
+from pipeline.services import report_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def _eligible(queryset, older_than: timedelta, status: str):
+    return queryset.filter(status=status, updated_at__lt=timezone.now() - older_than)
+
+
+def archivable_tasks(older_than: timedelta, status: str = 'completed'):
+    """Tasks in `status` whose last update is older than `older_than`"""
+    return _eligible(Task.objects.all(), older_than, status).order_by('id')
+
+
+def _archive_queryset(task_ids):
+    return (
+        Task.objects.filter(id__in=task_ids)
+        .select_related('final_analysis__best_vendor')
+        .prefetch_related(
+            Prefetch('vendors', queryset=Vendor.objects.prefetch_related('timeline')),
+            'subtasks',
+            Prefetch('capability_mappings', queryset=CapabilityMapping.objects.select_related('vendor', 'subtask')),
+            'validation_logs',
+        )
+    )
+
+
+def archive_document(task) -> dict:
+    """Everything stored for a task, as plain JSON-serializable data"""
+    from pipeline.serializers import TaskSerializer, CapabilityMappingSerializer
+
+    doc = dict(TaskSerializer(task).data)
+    doc['capability_mappings'] = CapabilityMappingSerializer(task.capability_mappings.all(), many=True).data
+    doc['validation_logs'] = [
+        {
+            'phase': log.phase,
+            'validation_type': log.validation_type,
+            'status': log.status,
+            'details': log.details,
+            'created_at': log.created_at,
+        }
+        for log in task.validation_logs.all()
+    ]
+    return doc
+
+
+def compress(doc: dict):
+    raw = json.dumps(doc, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(raw), len(raw)
+
+
+def decompress(payload) -> dict:
+    return json.loads(gzip.decompress(bytes(payload)).decode('utf-8'))
+
+
+def archive_batch(task_ids, older_than: timedelta, status: str = 'completed') -> int:
+    """Archive and delete one batch of tasks in a single short transaction.
+
+    Eligibility is checked again on the locked rows, so a task re-run since
+    it was listed stays live.
+    """
+    with transaction.atomic():
+        locked = _eligible(_archive_queryset(task_ids), older_than, status)
+        tasks = list(locked.select_for_update(of=('self',)))
+        already = set(TaskArchive.objects.filter(task_id__in=[t.id for t in tasks]).values_list('task_id', flat=True))
+        archives = []
+        for task in tasks:
+            if task.id in already:
+                continue
+            payload, size = compress(archive_document(task))
+            archives.append(TaskArchive(
+                task_id=task.id,
+                user_id=task.user_id,
+                status=task.status,
+                task_created_at=task.created_at,
+                payload=payload,
+                payload_size=size,
+            ))
+        TaskArchive.objects.bulk_create(archives)
+
+        ids = [t.id for t in tasks]
+        artifacts = list(PhaseProfile.objects.filter(task_id__in=ids).values_list('artifact', flat=True))
+        Task.objects.filter(id__in=ids).delete()
+
+        def _cleanup():
+            for task_id in ids:
+                report_cache.invalidate_report(task_id)
+            for name in artifacts:
+                if name:
+                    PhaseProfile._meta.get_field('artifact').storage.delete(name)
+        transaction.on_commit(_cleanup)
+    return len(ids)
+
+
+def get_archive(task_id):
+    archive = TaskArchive.objects.filter(task_id=task_id).first()
+    return decompress(archive.payload) if archive else None
+
+
+def report_from_archive(doc: dict) -> dict:
+    """Same shape as the live report endpoint"""
+    analysis = doc.get('final_analysis') or {}
+    return {
+        'task_id': doc['id'],
+        'task_description': doc['task_description'],
+        'status': doc['status'],
+        'automation_2024': analysis.get('automation_2024'),
+        'automation_2025': analysis.get('automation_2025'),
+        'automation_2026': analysis.get('automation_2026'),
+        'hrf_scores': analysis.get('hrf_scores'),
+        'rpi_score': analysis.get('rpi_score'),
+        'recommendations': analysis.get('recommendations'),
+        'best_vendor': analysis.get('best_vendor_name'),
+    }
@@ -0,0 +1,73 @@
+import logging
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+HISTORY_KEY = 'phase4:tokens_per_cell'
+HISTORY_TIMEOUT = 30 * 24 * 3600
+# Weight of a new observation in the running estimate
+SMOOTHING = 0.3
+# Headroom added to the estimate after a reply was cut off
+TRUNCATION_MARGIN = 1.25
+# Tokens for the {"capability_analysis": [...]} wrapper around the cells
+ENVELOPE_TOKENS = 20
+CHARS_PER_TOKEN = 4
+
+
+def tokens_per_cell() -> float:
+    """Running estimate of completion tokens per vendor x subtask cell.
+
+    Kept in the Django cache, so workers share it when CACHE_URL points at
+    a shared backend; starts from PHASE4_TOKENS_PER_CELL.
+    """
+    return cache.get(HISTORY_KEY) or settings.PHASE4_TOKENS_PER_CELL
+
+
+def observe(completion_tokens: int, cells: int, truncated: bool = False) -> float:
+    """Fold one reply into the estimate and return the new value.
+
+    A truncated reply only gives a lower bound, so it can raise the
+    estimate (with a margin) but never lower it.
+    """
+    current = tokens_per_cell()
+    if cells <= 0 or completion_tokens <= 0:
+        return current
+    sample = completion_tokens / cells
+    if truncated:
+        estimate = max(current, sample * TRUNCATION_MARGIN)
+    else:
+        estimate = current + SMOOTHING * (sample - current)
+    cache.set(HISTORY_KEY, estimate, HISTORY_TIMEOUT)
+    return estimate
+
+
+def estimate_completion_tokens(text: str, usage: dict) -> int:
+    """Completion tokens from the API's usage, or approximated from the reply length"""
+    return usage.get('completion_tokens') or len(text or '') // CHARS_PER_TOKEN
+
+
+def vendors_per_batch(subtask_count: int, max_tokens: int) -> int:
+    """How many vendors fit in one reply of `max_tokens`, keeping PHASE4_BUDGET_FRACTION of it in use"""
+    budget = max_tokens * settings.PHASE4_BUDGET_FRACTION - ENVELOPE_TOKENS
+    per_vendor = max(subtask_count, 1) * tokens_per_cell()
+    return max(1, min(settings.PHASE4_MAX_VENDORS_PER_BATCH, int(budget // per_vendor)))
+
+
+def plan_batches(items: list, subtask_count: int, max_tokens: int) -> list:
+    """Split `items` into the fewest batches that fit, sized evenly (10 at 4 -> 4, 3, 3)"""
+    if not items:
+        return []
+    size = vendors_per_batch(subtask_count, max_tokens)
+    count = math.ceil(len(items) / size)
+    base, extra = divmod(len(items), count)
+    batches, start = [], 0
+    for i in range(count):
+        end = start + base + (1 if i < extra else 0)
+        batches.append(items[start:end])
+        start = end
+    logger.info(f"[PHASE4] Planned {len(items)} vendors into {count} batches "
+                f"(up to {size} per call, ~{tokens_per_cell():.0f} tokens per cell)")
+    return batches
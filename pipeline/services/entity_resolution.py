@@ -0,0 +1,178 @@
+import ipaddress
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from pipeline.services import metrics
+from pipeline.services.utils import normalize_vendor_name
+
+# Legal-form words dropped from the end of a normalized name ("acme corp ltd" -> "acme")
+LEGAL_SUFFIXES = frozenset("""
+inc incorporated corp corporation co company ltd limited llc llp lp plc
+gmbh ag kg sa sas sarl srl spa bv nv oy ab as asa pty pvt kk
+""".split())
+
+# Second-level labels under two-letter country TLDs (example.co.uk, example.com.au)
+_SECOND_LEVEL = frozenset({'co', 'com', 'org', 'net', 'ac', 'gov', 'edu', 'ne', 'or'})
+
+
+def _join_initials(words):
+    """["s", "a"] (from "S.A.") -> ["sa"], so dotted legal forms and acronyms compare whole"""
+    joined, run = [], ''
+    for word in words:
+        if len(word) == 1:
+            run += word
+            continue
+        if run:
+            joined.append(run)
+            run = ''
+        joined.append(word)
+    if run:
+        joined.append(run)
+    return joined
+
+
+def canonical_name(name) -> str:
+    """Normalized vendor name with a leading "the" and trailing legal suffixes removed"""
+    words = _join_initials(normalize_vendor_name(name).split())
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def registrable_domain(url) -> str:
+    """Site domain of an evidence link ("https://docs.acme.co.uk/x" -> "acme.co.uk"); '' for IPs and bare hosts"""
+    host = (urlparse(str(url or '')).hostname or '').lower().rstrip('.')
+    if '.' not in host:
+        return ''
+    try:
+        ipaddress.ip_address(host)
+        return ''
+    except ValueError:
+        pass
+    labels = host.split('.')
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL else 2
+    return '.'.join(labels[-keep:])
+
+
+def trigrams(text: str) -> set:
+    """Word-padded character trigrams, as pg_trgm builds them"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class VendorResolver:
+    """Groups vendor records that name the same company.
+
+    Records are matched, in order of confidence, on the canonical name
+    (ignoring spaces, so "Open AI" is "OpenAI"), on the site domain of their
+    evidence link (unless it is a shared platform from ENTITY_SHARED_DOMAINS),
+    then on trigram similarity of canonical names (Jaccard, at least
+    ENTITY_SIMILARITY_THRESHOLD) through an in-memory inverted index. The
+    first record of a group names it.
+    """
+
+    def __init__(self, threshold=None, shared_domains=None):
+        if threshold is None:
+            threshold = getattr(settings, 'ENTITY_SIMILARITY_THRESHOLD', 0.6)
+        if shared_domains is None:
+            shared_domains = getattr(settings, 'ENTITY_SHARED_DOMAINS', [])
+        self.threshold = threshold
+        self.shared_domains = {d.lower() for d in shared_domains}
+        self.entities = []
+        self._by_name = {}                  # canonical name without spaces -> entity id
+        self._by_domain = {}
+        self._postings = defaultdict(set)   # trigram -> entity ids
+        self._gram_counts = []
+
+    def add(self, name, evidence_url='', existing=False):
+        """Index one record; returns (entity id, matching signal or None for a new entity)"""
+        key = canonical_name(name)
+        domain = registrable_domain(evidence_url)
+        if domain in self.shared_domains:
+            domain = ''
+        grams = trigrams(key)
+
+        entity_id, signal = self._match(key, domain, grams)
+        if entity_id is None:
+            entity_id = len(self.entities)
+            self.entities.append({'name': name, 'existing': existing, 'aliases': []})
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].add(entity_id)
+        else:
+            self.entities[entity_id]['aliases'].append(name)
+
+        self._by_name.setdefault(key.replace(' ', ''), entity_id)
+        if domain:
+            self._by_domain.setdefault(domain, entity_id)
+        return entity_id, signal
+
+    def _match(self, key, domain, grams):
+        if key.replace(' ', '') in self._by_name:
+            return self._by_name[key.replace(' ', '')], 'name'
+        if domain and domain in self._by_domain:
+            return self._by_domain[domain], 'domain'
+        shared = Counter()
+        for gram in grams:
+            for entity_id in self._postings.get(gram, ()):
+                shared[entity_id] += 1
+        best, best_score = None, 0.0
+        for entity_id, count in shared.items():
+            score = count / (len(grams) + self._gram_counts[entity_id] - count)
+            if score > best_score:
+                best, best_score = entity_id, score
+        if best is not None and best_score >= self.threshold:
+            return best, 'trigram'
+        return None, None
+
+
+def resolve_vendors(vendors, existing=()):
+    """Merge LLM vendor records that refer to the same company.
+
+    `vendors` are phase 1 records (vendor_company, product_name,
+    evidence_link, ...); `existing` is (vendor_name, evidence_url) pairs
+    already stored for the task, so a re-run maps onto the same rows.
+    Returns the merged records, each with `canonical_name` and `aliases`
+    added; product names of merged records are combined and the first
+    non-empty evidence link is kept. Records without a name pass through
+    untouched for validation to reject.
+    """
+    resolver = VendorResolver()
+    for name, evidence_url in existing:
+        resolver.add(name, evidence_url, existing=True)
+
+    merged = {}
+    passthrough = []
+    for vendor in vendors:
+        name = str(vendor.get('vendor_company') or '').strip() if isinstance(vendor, dict) else ''
+        if not canonical_name(name):
+            passthrough.append(vendor)
+            continue
+        entity_id, signal = resolver.add(name, vendor.get('evidence_link', ''))
+        if signal is not None:
+            metrics.VENDORS_MERGED.labels(signal=signal).inc()
+        entity = resolver.entities[entity_id]
+        if entity_id not in merged:
+            merged[entity_id] = dict(vendor, vendor_company=entity['name'],
+                                     canonical_name=canonical_name(entity['name']), aliases=[])
+            if name != entity['name']:
+                merged[entity_id]['aliases'].append(name)
+            continue
+
+        record = merged[entity_id]
+        record['aliases'].append(name)
+        products = [p.strip() for p in str(record.get('product_name') or '').split(',') if p.strip()]
+        product = str(vendor.get('product_name') or '').strip()
+        if product and product not in products:
+            record['product_name'] = ', '.join(products + [product])[:255]
+        if not record.get('evidence_link') and vendor.get('evidence_link'):
+            record['evidence_link'] = vendor['evidence_link']
+
+    return list(merged.values()) + passthrough
@@ -0,0 +1,236 @@
+import csv
+import json
+import logging
+from typing import Any, Dict, Iterator, Optional
+
+from django.db.models import Prefetch
+
+from pipeline.models import Task, CapabilityMapping
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Flat column layout shared by CSV and Parquet; nested collections are
+# serialized as JSON strings in those formats.
+EXPORT_COLUMNS = [
+    'task_id', 'user_id', 'task_description', 'status', 'created_at', 'updated_at',
+    'error_message', 'vendor_count', 'mapping_count', 'vendors', 'capability_mappings',
+    'best_vendor', 'automation_2024', 'automation_2025', 'automation_2026',
+    'rpi_score', 'hrf_scores', 'recommendations',
+]
+NESTED_COLUMNS = {'vendors', 'capability_mappings', 'hrf_scores', 'recommendations'}
+
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet') if PARQUET_AVAILABLE else ('ndjson', 'csv')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_queryset(status: Optional[str] = None):
+    """Tasks with everything the export needs loaded per chunk."""
+    qs = (
+        Task.objects
+        .select_related('final_analysis__best_vendor')
+        .prefetch_related(
+            'vendors',
+            Prefetch(
+                'capability_mappings',
+                queryset=CapabilityMapping.objects.select_related('vendor', 'subtask'),
+            ),
+        )
+        .order_by('id')
+    )
+    if status:
+        qs = qs.filter(status=status)
+    return qs
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def task_to_row(task: Task) -> Dict[str, Any]:
+    """Flatten one task and its children into an export row."""
+    vendors = [{
+        'id': v.id,
+        'vendor_name': v.vendor_name,
+        'product_name': v.product_name,
+        'evidence_url': v.evidence_url,
+        'source': v.source,
+        'status': v.status,
+        'aps_2024': v.aps_2024,
+        'aps_2025': v.aps_2025,
+        'aps_2026': v.aps_2026,
+        'is_verified': v.is_verified,
+    } for v in task.vendors.all()]
+
+    mappings = [{
+        'vendor': m.vendor.vendor_name,
+        'subtask': m.subtask.subtask_name,
+        'can_handle': m.can_handle,
+        'aps_2024': m.aps_2024,
+        'aps_2025': m.aps_2025,
+        'aps_2026': m.aps_2026,
+        'improvement_rate': m.improvement_rate,
+    } for m in task.capability_mappings.all()]
+
+    try:
+        analysis = task.final_analysis
+    except Task.final_analysis.RelatedObjectDoesNotExist:
+        analysis = None
+
+    return {
+        'task_id': task.id,
+        'user_id': task.user_id,
+        'task_description': task.task_description,
+        'status': task.status,
+        'created_at': _iso(task.created_at),
+        'updated_at': _iso(task.updated_at),
+        'error_message': task.error_message,
+        'vendor_count': len(vendors),
+        'mapping_count': len(mappings),
+        'vendors': vendors,
+        'capability_mappings': mappings,
+        'best_vendor': analysis.best_vendor.vendor_name if analysis and analysis.best_vendor else None,
+        'automation_2024': analysis.automation_2024 if analysis else None,
+        'automation_2025': analysis.automation_2025 if analysis else None,
+        'automation_2026': analysis.automation_2026 if analysis else None,
+        'rpi_score': analysis.rpi_score if analysis else None,
+        'hrf_scores': analysis.hrf_scores if analysis else None,
+        'recommendations': analysis.recommendations if analysis else None,
+    }
+
+
+def iter_rows(status: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield export rows, holding at most one chunk of tasks in memory."""
+    for task in export_queryset(status).iterator(chunk_size=chunk_size):
+        yield task_to_row(task)
+
+
+def _flat(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        col: json.dumps(row[col]) if col in NESTED_COLUMNS and row[col] is not None else row[col]
+        for col in EXPORT_COLUMNS
+    }
+
+
+class _Echo:
+    """File-like object whose write() hands back the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """Write-only file object that buffers bytes until drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+        self._pos = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def stream_csv(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(_flat(row))
+
+
+def stream_parquet(rows: Iterator[Dict[str, Any]], row_group_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Write one Parquet row group per `row_group_size` rows, yielding bytes as they are produced."""
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet export requires `pyarrow`. Install it with `pip install pyarrow`.")
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+
+    schema = pa.schema([
+        ('task_id', pa.int64()),
+        ('user_id', pa.string()),
+        ('task_description', pa.string()),
+        ('status', pa.string()),
+        ('created_at', pa.string()),
+        ('updated_at', pa.string()),
+        ('error_message', pa.string()),
+        ('vendor_count', pa.int64()),
+        ('mapping_count', pa.int64()),
+        ('vendors', pa.string()),
+        ('capability_mappings', pa.string()),
+        ('best_vendor', pa.string()),
+        ('automation_2024', pa.float64()),
+        ('automation_2025', pa.float64()),
+        ('automation_2026', pa.float64()),
+        ('rpi_score', pa.float64()),
+        ('hrf_scores', pa.string()),
+        ('recommendations', pa.string()),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+
+    def write_group():
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema), row_group_size=len(batch))
+        batch.clear()
+
+    for row in rows:
+        batch.append(_flat(row))
+        if len(batch) >= row_group_size:
+            write_group()
+            yield sink.drain()
+    if batch:
+        write_group()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(fmt: str, status: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Return an iterator of str/bytes chunks for the requested format."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+
+    logger.info(f"[EXPORT] Streaming {fmt} export (status={status or 'any'}, chunk_size={chunk_size})")
+    rows = iter_rows(status=status, chunk_size=chunk_size)
+    if fmt == 'ndjson':
+        return stream_ndjson(rows)
+    if fmt == 'csv':
+        return stream_csv(rows)
+    return stream_parquet(rows, row_group_size=chunk_size)
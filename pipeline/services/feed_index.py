@@ -0,0 +1,76 @@
+import heapq
+import html
+import math
+import re
+from collections import Counter, defaultdict
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.-]*[a-z0-9+#]|[a-z0-9]')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in into is it its of on or our that the their this to
+was we were what when which who will with you your new now using use via vs about can all more
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens with HTML and stopwords removed (keeps terms like c++, gpt-4, .net).
+
+    Hyphenated words also yield their parts, so "ai-powered" matches "ai".
+    """
+    if not text:
+        return []
+    text = html.unescape(_TAG_RE.sub(' ', text)).lower()
+    tokens = []
+    for tok in _TOKEN_RE.findall(text):
+        if tok not in STOPWORDS:
+            tokens.append(tok)
+        if '-' in tok:
+            tokens.extend(part for part in tok.split('-') if part and part not in STOPWORDS)
+    return tokens
+
+
+class FeedIndex:
+    """In-memory inverted index over feed entries, ranked with Okapi BM25.
+
+    Titles are counted `title_weight` times so a match in the headline
+    outranks one buried in a long summary.
+    """
+
+    def __init__(self, entries, k1=1.2, b=0.75, title_weight=2):
+        self.entries = list(entries)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)   # term -> [(doc_id, term frequency)]
+        self.doc_lengths = []
+
+        for doc_id, entry in enumerate(self.entries):
+            tokens = tokenize(entry.get('title', '')) * title_weight + tokenize(entry.get('summary', ''))
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((doc_id, tf))
+
+        n = len(self.entries)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Top `limit` (score, entry) pairs for `query`, best first"""
+        if not self.entries:
+            return []
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.entries[doc_id]) for doc_id, score in best]
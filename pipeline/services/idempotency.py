@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from pipeline.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+
+def get_key(request) -> Optional[str]:
+    """Return the Idempotency-Key header value, if the client sent one"""
+    key = (request.META.get(HEADER) or '').strip()
+    return key[:MAX_KEY_LENGTH] or None
+
+
+def fingerprint(request) -> str:
+    """Hash of method, path and parsed body, used to detect key reuse with a different request"""
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except Exception:
+        body = repr(request.data)
+    raw = f"{request.method}:{request.path}:{body}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def begin(key: str, scope: str, request_hash: str) -> Tuple[Optional[IdempotencyKey], bool]:
+    """Claim `key` for `scope`. Returns (record, created); created=False means a replay.
+
+    A key released by a failed request between our insert and lookup is
+    claimed again once; (None, False) means it kept changing hands and the
+    client should simply retry.
+    """
+    ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400)
+    now = timezone.now()
+
+    # Expired keys behave as if they were never used
+    IdempotencyKey.objects.filter(key=key, scope=scope, expires_at__lte=now).delete()
+
+    for _attempt in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key,
+                    scope=scope,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=ttl),
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(key=key, scope=scope).first()
+            if record is not None:
+                return record, False
+    return None, False
+
+
+def complete(record: IdempotencyKey, status_code: int, body) -> None:
+    """Store the response so retries can replay it"""
+    record.status = 'completed'
+    record.response_status = status_code
+    record.response_body = body
+    record.save(update_fields=['status', 'response_status', 'response_body'])
+
+
+def release(record: IdempotencyKey) -> None:
+    """Forget a key whose request failed, so the client may retry with it"""
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def retry_after() -> int:
+    """Seconds a client should wait before retrying a key that is in flight"""
+    return getattr(settings, 'IDEMPOTENCY_RETRY_AFTER', 5)
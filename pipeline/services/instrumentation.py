@@ -0,0 +1,92 @@
+import contextlib
+import functools
+import logging
+import time
+
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+
+from pipeline.services import metrics, profiler, query_profiler, tracing
+from pipeline.services.validation_log import validation_log
+
+logger = logging.getLogger(__name__)
+
+
+def instrument_phase(phase: str):
+    """Decorator for async `run_phaseN` functions: records duration and outcome"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(task_id, *args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                with tracing.span(f'phase.{phase}', task_id=task_id), _phase_queries(phase, task_id):
+                    if profiler.is_requested():
+                        async with profiler.profile_phase(phase, task_id):
+                            result = await func(task_id, *args, **kwargs)
+                    else:
+                        result = await func(task_id, *args, **kwargs)
+                outcome = 'success'
+                return result
+            except Exception as e:
+                validation_log.record(task_id, phase, 'phase_error', 'failed',
+                                      {'error': str(e)[:500], 'type': type(e).__name__})
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.PHASE_DURATION.labels(phase=phase, outcome=outcome).observe(elapsed)
+                logger.info(f"[METRICS] {phase} task={task_id} outcome={outcome} duration={elapsed:.2f}s")
+                await sync_to_async(_finish_phase)()
+        return wrapper
+    return decorator
+
+
+def release_connections():
+    """Close this thread's DB connections unless one is inside an atomic block"""
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close()
+
+
+def _finish_phase():
+    # Runs on the thread that did the phase's DB work: write its validation
+    # logs, then release that thread's connections (back to the pool with
+    # the pooled backend)
+    validation_log.flush()
+    release_connections()
+
+
+def _phase_queries(phase: str, task_id):
+    if not query_profiler.is_enabled():
+        return contextlib.nullcontext()
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(phase)
+    return query_profiler.profile_queries(f"{phase} task={task_id}", budget=budget)
+
+
+def instrument_store(store: str):
+    """Decorator for sync DB store functions; an int return value counts as rows written"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                with tracing.span(f'db.store.{store}'), profiler.profile_sync():
+                    result = func(*args, **kwargs)
+                outcome = 'success'
+                if isinstance(result, int) and not isinstance(result, bool):
+                    metrics.DB_ROWS_WRITTEN.labels(store=store).inc(result)
+                return result
+            finally:
+                metrics.DB_STORE_DURATION.labels(store=store, outcome=outcome).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def traced_atomic(name: str, using=None):
+    """`transaction.atomic()` wrapped in a span, so commit time shows up in traces"""
+    with tracing.span(f'db.transaction.{name}'):
+        with transaction.atomic(using=using):
+            yield
@@ -2,11 +2,15 @@
 
 import os
 import asyncio
+import contextvars
 import logging
 import time
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Any
 
+from pipeline.prompts.template import chat_messages
+from pipeline.services import metrics, tracing
+
 logger = logging.getLogger(__name__)
 
 # make threadpool size configurable
@@ -52,6 +56,46 @@ def _extract_text_from_response(resp: Any) -> str:
         return ""
 
 
+def _extract_usage(resp: Any) -> dict:
+    """Return prompt/completion token counts from an SDK response, if reported.
+
+    `cached_tokens` (prompt tokens served from the provider's prefix cache)
+    comes from `usage.prompt_tokens_details` when the API includes it.
+    """
+    usage = getattr(resp, "usage", None)
+    if usage is None and isinstance(resp, dict):
+        usage = resp.get("usage")
+    if not usage:
+        return {}
+
+    def _get(name):
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        return value if isinstance(value, int) else None
+
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+
+    return {k: v for k, v in (
+        ("prompt_tokens", _get("prompt_tokens")),
+        ("completion_tokens", _get("completion_tokens")),
+        ("cached_tokens", cached if isinstance(cached, int) else None),
+    ) if v is not None}
+
+
+def _extract_finish_reason(resp: Any) -> Optional[str]:
+    """`finish_reason` of the first choice ('stop', 'length', ...), if reported."""
+    try:
+        choices = getattr(resp, "choices", None)
+        if choices is None and isinstance(resp, dict):
+            choices = resp.get("choices")
+        if choices:
+            c0 = choices[0]
+            return c0.get("finish_reason") if isinstance(c0, dict) else getattr(c0, "finish_reason", None)
+    except Exception:
+        logger.debug("_extract_finish_reason failed; raw: %r", resp)
+    return None
+
+
 class AzureOpenAILLMService:
     """Azure OpenAI LLM client with flexible SDK support.
 
@@ -104,56 +148,100 @@ class AzureOpenAILLMService:
         # if neither worked, raise a clear error
         raise ImportError("No supported Azure OpenAI client found. Install `openai` or `azure-ai-openai` packages.")
 
+    def _create_completion(self, prompt: str, temperature: float, max_tokens: int) -> Any:
+        """Issue one blocking completion request with whichever SDK was initialised"""
+        # Template prompts send their static instructions first (system
+        # message) so the provider can serve that prefix from its cache
+        messages = chat_messages(prompt)
+        # prefer chat completions when available
+        if self.sdk == "openai":
+            return self.client.chat.completions.create(
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                model=self.deployment,
+            )
+        elif self.sdk == "azure_sdk":
+            # azure.ai.openai OpenAIClient shape: get_chat_completions(deployment, messages=...)
+            try:
+                return self.client.get_chat_completions(self.deployment, messages=messages,
+                                                        temperature=temperature, max_tokens=max_tokens)
+            except Exception:
+                # some versions expose get_completions / get_chat_completions differently
+                return self.client.get_completions(self.deployment, str(prompt), temperature=temperature, max_tokens=max_tokens)
+        raise RuntimeError("Unsupported LLM SDK configuration")
+
     async def call_llm(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000, retries: int = 2) -> str:
         """Asynchronously call the LLM using a thread executor and return text.
 
         This method is safe to call from async Django/ASGI views. For sync
         Django views, use the `call_llm_sync` helper below.
         """
+        result = await self.complete(prompt, temperature=temperature, max_tokens=max_tokens, retries=retries)
+        return result["text"]
+
+    async def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000, retries: int = 2) -> dict:
+        """Like `call_llm`, but returns {'text', 'finish_reason', 'usage'}.
+
+        `finish_reason` is 'length' when the reply was cut off at
+        `max_tokens`; `usage` holds prompt/completion token counts when the
+        API reports them.
+        """
         loop = asyncio.get_event_loop()
+        metrics.LLM_PROMPT_CHARS.observe(len(prompt) if prompt else 0)
+        submitted = time.perf_counter()
 
         def make_request():
+            queue_wait_ms = (time.perf_counter() - submitted) * 1000
             attempt = 0
             while True:
+                started = time.perf_counter()
                 try:
-                    # prefer chat completions when available
-                    if self.sdk == "openai":
-                        resp = self.client.chat.completions.create(
-                            messages=[
-                                {"role": "system", "content": "Output ONLY valid JSON. No markdown, no extra text."},
-                                {"role": "user", "content": prompt},
-                            ],
-                            max_tokens=max_tokens,
-                            temperature=temperature,
-                            model=self.deployment,
-                        )
-                    elif self.sdk == "azure_sdk":
-                        # azure.ai.openai OpenAIClient shape: get_chat_completions(deployment, messages=...)
-                        try:
-                            resp = self.client.get_chat_completions(self.deployment, messages=[
-                                {"role": "system", "content": "Output ONLY valid JSON. No markdown, no extra text."},
-                                {"role": "user", "content": prompt},
-                            ], temperature=temperature, max_tokens=max_tokens)
-                        except Exception:
-                            # some versions expose get_completions / get_chat_completions differently
-                            resp = self.client.get_completions(self.deployment, prompt, temperature=temperature, max_tokens=max_tokens)
-                    else:
-                        raise RuntimeError("Unsupported LLM SDK configuration")
-
-                    text = _extract_text_from_response(resp)
-                    return text
+                    with tracing.span(
+                        "llm.attempt", attempt=attempt + 1, prompt_chars=len(prompt) if prompt else 0,
+                        queue_wait_ms=queue_wait_ms if attempt == 0 else None,
+                    ) as current_span:
+                        resp = self._create_completion(prompt, temperature, max_tokens)
+                        text = _extract_text_from_response(resp)
+                        usage = _extract_usage(resp)
+                        finish_reason = _extract_finish_reason(resp)
+                        tracing.set_attributes(current_span, response_chars=len(text) if text else 0,
+                                               finish_reason=finish_reason, **usage)
+
+                    metrics.LLM_REQUEST_DURATION.labels(outcome="success").observe(time.perf_counter() - started)
+                    for kind, count in usage.items():
+                        metrics.LLM_TOKENS.labels(kind=kind.replace("_tokens", "")).inc(count)
+                    if "prompt_tokens" in usage:
+                        phase = getattr(prompt, "phase", None) or "unknown"
+                        cached = usage.get("cached_tokens", 0)
+                        metrics.LLM_PROMPT_CACHE.labels(phase=phase, kind="cached").inc(cached)
+                        metrics.LLM_PROMPT_CACHE.labels(phase=phase, kind="uncached").inc(usage["prompt_tokens"] - cached)
+                    if finish_reason == "length":
+                        metrics.LLM_TRUNCATED.inc()
+                    return {"text": text, "finish_reason": finish_reason, "usage": usage}
 
                 except Exception as err:
+                    metrics.LLM_REQUEST_DURATION.labels(outcome="error").observe(time.perf_counter() - started)
                     attempt += 1
                     logger.warning("LLM request failed (attempt %d/%d): %s", attempt, retries + 1, err)
                     if attempt > retries:
                         logger.exception("LLM failed after retries")
                         raise
+                    metrics.LLM_RETRIES.inc()
                     backoff = 1.0 * (2 ** (attempt - 1))
                     time.sleep(backoff)
 
-        result = await loop.run_in_executor(executor, make_request)
-        logger.debug("LLM response length: %d", len(result) if result else 0)
+        try:
+            # copy_context() carries the current span into the executor thread
+            with tracing.span("llm.call", max_tokens=max_tokens):
+                ctx = contextvars.copy_context()
+                result = await loop.run_in_executor(executor, ctx.run, make_request)
+        except Exception:
+            metrics.LLM_CALLS.labels(outcome="failure").inc()
+            raise
+        metrics.LLM_CALLS.labels(outcome="success").inc()
+        metrics.LLM_RESPONSE_CHARS.observe(len(result["text"]) if result["text"] else 0)
+        logger.debug("LLM response length: %d", len(result["text"]) if result["text"] else 0)
         return result
 
 
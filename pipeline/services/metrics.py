@@ -0,0 +1,153 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import (  # type: ignore
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        REGISTRY,
+        generate_latest,
+        multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+if not PROMETHEUS_AVAILABLE:
+    Counter = Histogram = _NoopMetric  # type: ignore  # noqa: F811
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+CHECK_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+SIZE_BUCKETS = (256, 1024, 4096, 8192, 16384, 32768, 65536, 131072)
+
+PHASE_DURATION = Histogram(
+    'pipeline_phase_duration_seconds', 'Wall-clock duration of a pipeline phase run',
+    ['phase', 'outcome'], buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    'pipeline_llm_request_duration_seconds', 'Duration of a single LLM request attempt',
+    ['outcome'], buckets=LATENCY_BUCKETS,
+)
+LLM_CALLS = Counter(
+    'pipeline_llm_calls_total', 'LLM calls by final outcome (after retries)', ['outcome'],
+)
+LLM_RETRIES = Counter(
+    'pipeline_llm_retries_total', 'LLM request attempts that failed and were retried',
+)
+LLM_PROMPT_CACHE = Counter(
+    'pipeline_llm_prompt_cache_tokens_total', 'Prompt tokens by phase, split by provider prefix-cache hits',
+    ['phase', 'kind'],
+)
+LLM_TRUNCATED = Counter(
+    'pipeline_llm_truncated_total', 'LLM replies cut off at max_tokens (finish_reason=length)',
+)
+PROMPT_TOKENS = Histogram(
+    'pipeline_prompt_tokens', 'Prompt size in tokens as built for each phase', ['phase'], buckets=TOKEN_BUCKETS,
+)
+PROMPT_SECTIONS_TRUNCATED = Counter(
+    'pipeline_prompt_sections_truncated_total', 'Prompt sections cut to their token budget', ['phase', 'section'],
+)
+LLM_PROMPT_CHARS = Histogram(
+    'pipeline_llm_prompt_chars', 'Prompt size in characters', buckets=SIZE_BUCKETS,
+)
+LLM_RESPONSE_CHARS = Histogram(
+    'pipeline_llm_response_chars', 'Response size in characters', buckets=SIZE_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    'pipeline_llm_tokens_total', 'Tokens reported by the LLM API', ['kind'],
+)
+JSON_PARSE = Counter(
+    'pipeline_json_parse_total', 'safe_json_extract outcomes by winning strategy', ['strategy'],
+)
+DB_STORE_DURATION = Histogram(
+    'pipeline_db_store_duration_seconds', 'Duration of phase DB store functions',
+    ['store', 'outcome'], buckets=DB_BUCKETS,
+)
+DB_ROWS_WRITTEN = Counter(
+    'pipeline_db_rows_written_total', 'Rows written by phase DB store functions', ['store'],
+)
+FEED_FETCH = Counter(
+    'pipeline_feed_fetch_total', 'Feed cache lookups by result (hit, not_modified, fetched, error, timeout)', ['result'],
+)
+FEED_FETCH_DURATION = Histogram(
+    'pipeline_feed_fetch_duration_seconds', 'Duration of conditional feed requests', buckets=LATENCY_BUCKETS,
+)
+VENDOR_CONTEXT = Counter(
+    'pipeline_vendor_context_total', 'Phase 1 vendor context lookups by result', ['result'],
+)
+VENDOR_CONTEXT_DURATION = Histogram(
+    'pipeline_vendor_context_duration_seconds', 'Time spent gathering phase 1 vendor context',
+    buckets=LATENCY_BUCKETS,
+)
+VALIDATION_CHECK_DURATION = Histogram(
+    'pipeline_validation_check_duration_seconds', 'Time one vendor validation check took for a batch',
+    ['check'], buckets=CHECK_BUCKETS,
+)
+VALIDATION_CHECK_RESULTS = Counter(
+    'pipeline_validation_check_results_total', 'Vendor outcomes decided by each validation check',
+    ['check', 'outcome'],
+)
+VENDORS_MERGED = Counter(
+    'pipeline_vendors_merged_total', 'Duplicate vendor records merged before storage', ['signal'],
+)
+PHASE4_BATCH_VENDORS = Histogram(
+    'pipeline_phase4_batch_vendors', 'Vendors packed into one phase 4 capability prompt',
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+PHASE4_BATCH_SPLITS = Counter(
+    'pipeline_phase4_batch_splits_total', 'Phase 4 batches split and retried after a truncated reply',
+)
+URL_VERIFY = Counter(
+    'pipeline_url_verify_total', 'Evidence URL checks by result', ['result'],
+)
+
+VALIDATION_EVENTS = Counter(
+    'pipeline_validation_events_total', 'Validation events recorded by phases', ['phase', 'status'],
+)
+VALIDATION_EVENTS_DROPPED = Counter(
+    'pipeline_validation_events_dropped_total', 'Validation events dropped before reaching the database',
+    ['reason'],
+)
+
+
+def render_latest():
+    """Return (body, content_type) in Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (gunicorn/uwsgi with several workers),
+    samples from every worker process are merged; otherwise only this
+    process is reported.
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client is not installed; metrics are disabled\n", CONTENT_TYPE_LATEST
+
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,216 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler  # type: ignore
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    SamplingProfiler = None
+    PYINSTRUMENT_AVAILABLE = False
+
+# Set by run_phase_in_thread(..., profile=True) for a single run
+_requested = contextvars.ContextVar('phase_profiling_requested', default=False)
+# The cProfile-based run in progress, so sync_to_async store calls can add to it
+_active_run = contextvars.ContextVar('phase_profile_run', default=None)
+
+# tracemalloc peaks and the profilers are process- or thread-global, so one
+# phase is profiled at a time; phases started meanwhile run unprofiled
+_profiling_lock = threading.Lock()
+
+SUMMARY_FUNCTIONS = 40
+SUMMARY_ALLOCATIONS = 25
+
+
+def request_profiling(enabled: bool = True):
+    """Profile phases started from the current context; returns a reset token"""
+    return _requested.set(enabled)
+
+
+def is_requested() -> bool:
+    return _requested.get() or getattr(settings, 'PHASE_PROFILING', False)
+
+
+def _engine() -> str:
+    engine = getattr(settings, 'PHASE_PROFILER', 'auto')
+    if engine == 'pyinstrument' and not PYINSTRUMENT_AVAILABLE:
+        logger.warning("[PROFILE] PHASE_PROFILER=pyinstrument but pyinstrument is not installed; using cProfile")
+        return 'cprofile'
+    if engine == 'auto':
+        return 'pyinstrument' if PYINSTRUMENT_AVAILABLE else 'cprofile'
+    return engine
+
+
+class _CProfileRun:
+    """cProfile profiles for the phase thread plus every store call it hands off"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.profiles = []
+
+    def new_profile(self):
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        return profile
+
+    def stats(self):
+        stats = None
+        for profile in self.profiles:
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+
+@contextlib.contextmanager
+def profile_sync():
+    """Profile a sync call running in another thread into the active phase profile.
+
+    Used around `sync_to_async` store functions, which cProfile would not
+    see from the phase thread. A no-op when no cProfile run is active.
+    """
+    run = _active_run.get()
+    if run is None:
+        yield
+        return
+    profile = run.new_profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler already owns this thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+
+
+def _allocation_summary(snapshot) -> str:
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Traced memory: current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB",
+             f"Top {SUMMARY_ALLOCATIONS} allocation sites:"]
+    for stat in snapshot.statistics('lineno')[:SUMMARY_ALLOCATIONS]:
+        lines.append(f"  {stat}")
+    return '\n'.join(lines)
+
+
+def _save_profile(task_id, phase, engine, duration, peak_memory, summary, filename, content):
+    from pipeline.models import PhaseProfile
+
+    record = PhaseProfile(
+        task_id=task_id,
+        phase=phase,
+        engine=engine,
+        duration=duration,
+        peak_memory=peak_memory,
+        summary=summary,
+    )
+    record.artifact.save(filename, ContentFile(content), save=False)
+    record.save()
+    return record
+
+
+def _start_profiler(engine):
+    """Start the sampler or the main cProfile; returns (sampler, run, main_profile) or None"""
+    try:
+        if engine == 'pyinstrument':
+            sampler = SamplingProfiler(async_mode='enabled')
+            sampler.start()
+            return sampler, None, None
+        run = _CProfileRun()
+        main_profile = run.new_profile()
+        main_profile.enable()
+        return None, run, main_profile
+    except (ValueError, RuntimeError) as e:
+        # Another profiler (a debugger, coverage, an outer cProfile) owns this thread
+        logger.warning(f"[PROFILE] Could not start {engine}: {e}")
+        return None
+
+
+@contextlib.asynccontextmanager
+async def profile_phase(phase: str, task_id: int):
+    """Profile one phase run and store the artifact as a PhaseProfile row.
+
+    Uses pyinstrument when installed (HTML report), otherwise cProfile
+    (a .prof file for snakeviz/pstats). tracemalloc runs alongside either
+    and its top allocation sites go into the summary. Only one phase is
+    profiled at a time; a phase started while another is profiled, or
+    whose profiler cannot start, runs without a profile. Failing to save
+    the profile never fails the phase.
+    """
+    from asgiref.sync import sync_to_async
+
+    if not _profiling_lock.acquire(blocking=False):
+        logger.warning(f"[PROFILE] Another phase is being profiled; task {task_id} {phase} runs unprofiled")
+        yield
+        return
+
+    try:
+        engine = _engine()
+        profilers = _start_profiler(engine)
+        if profilers is None:
+            yield
+            return
+        sampler, run, main_profile = profilers
+
+        own_tracing = not tracemalloc.is_tracing()
+        if own_tracing:
+            tracemalloc.start(getattr(settings, 'PHASE_PROFILE_TRACEMALLOC_FRAMES', 10))
+        tracemalloc.reset_peak()
+        run_token = _active_run.set(run) if run is not None else None
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if sampler is not None:
+                sampler.stop()
+            else:
+                main_profile.disable()
+                _active_run.reset(run_token)
+            snapshot = tracemalloc.take_snapshot()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            allocations = _allocation_summary(snapshot)
+            if own_tracing:
+                tracemalloc.stop()
+
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            if sampler is not None:
+                summary = sampler.output_text(unicode=True, color=False) + '\n' + allocations
+                filename = f"task{task_id}_{phase}_{stamp}.html"
+                content = sampler.output_html().encode('utf-8')
+            else:
+                stats = run.stats()
+                out = io.StringIO()
+                stats.stream = out
+                stats.sort_stats('cumulative').print_stats(SUMMARY_FUNCTIONS)
+                summary = out.getvalue() + '\n' + allocations
+                filename = f"task{task_id}_{phase}_{stamp}.prof"
+                # Same format as Stats.dump_stats(), readable by pstats and snakeviz
+                content = marshal.dumps(stats.stats)
+
+            try:
+                await sync_to_async(_save_profile)(
+                    task_id, phase, engine, duration, peak_memory, summary, filename, content
+                )
+                logger.info(f"[PROFILE] Saved {engine} profile for task {task_id} {phase} ({duration:.2f}s)")
+            except Exception as e:
+                logger.error(f"[PROFILE] Could not save profile for task {task_id} {phase}: {e}")
+    finally:
+        _profiling_lock.release()
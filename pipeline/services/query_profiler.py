@@ -0,0 +1,163 @@
+import contextlib
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_profile = contextvars.ContextVar('query_profile', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a profiled block runs more queries than its budget allows."""
+
+
+def query_shape(sql: str) -> str:
+    """Normalise SQL so queries differing only in literals compare equal"""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+class QueryProfile:
+    """Query count, DB time and repeated query shapes for one request or phase"""
+
+    def __init__(self, label: str, budget=None, parent=None):
+        self.label = label
+        self.budget = budget
+        self.parent = parent
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.deferred = False
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, duration: float):
+        shape = query_shape(sql)
+        profile = self
+        while profile is not None:
+            with profile._lock:
+                profile.count += 1
+                profile.total_time += duration
+                profile.shapes[shape] += 1
+            profile = profile.parent
+
+    def duplicates(self, threshold=None):
+        """Query shapes run at least `threshold` times (likely N+1 patterns)"""
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_DUPLICATE_THRESHOLD', 5)
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self) -> str:
+        return (f"[QUERIES] {self.label} queries={self.count} db_ms={self.total_time * 1000:.1f} "
+                f"dupes={len(self.duplicates())}")
+
+    def report(self, enforce=None, failed=False):
+        """Log the summary and repeated shapes, then check the budget.
+
+        With `enforce` (default: settings.QUERY_BUDGET_ENFORCE) an exceeded
+        budget raises QueryBudgetExceeded, except after a `failed` block,
+        whose own exception must not be masked.
+        """
+        logger.info(self.summary() + (' failed=true' if failed else ''))
+        for shape, n in self.duplicates()[:3]:
+            logger.warning(f"[QUERIES] {self.label} possible N+1: {n}x {shape[:200]}")
+
+        if self.budget is not None and self.count > self.budget:
+            message = f"{self.label} ran {self.count} queries, budget is {self.budget}"
+            if enforce is None:
+                enforce = getattr(settings, 'QUERY_BUDGET_ENFORCE', False)
+            if enforce and not failed:
+                raise QueryBudgetExceeded(message)
+            logger.warning(f"[QUERIES] Budget exceeded: {message}")
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - start)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """`connection_created` receiver: hook every new DB connection, on any thread"""
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'QUERY_PROFILING', False)
+
+
+@contextlib.contextmanager
+def profile_queries(label: str, budget=None, enforce=None):
+    """Count queries issued inside the block, including from sync_to_async threads.
+
+    Reports on exit, also when the block raises (see QueryProfile.report).
+    The budget may be assigned to the yielded profile after entry, e.g.
+    once the URL is resolved. After `profile_stream` the report waits for
+    the stream instead.
+    """
+    profile = QueryProfile(label, budget=budget, parent=_current_profile.get())
+    token = _current_profile.set(profile)
+    failed = False
+    try:
+        yield profile
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _current_profile.reset(token)
+        if not profile.deferred:
+            profile.report(enforce=enforce, failed=failed)
+
+
+def profile_stream(profile: QueryProfile, chunks, enforce=None):
+    """Keep counting into `profile` while a streaming response body is consumed.
+
+    Streaming views run their queries after the view (and the profiled
+    block) has returned; wrap the response content with this and the
+    profile reports once the stream is exhausted or closed.
+    """
+    profile.deferred = True
+
+    def _stream():
+        iterator = iter(chunks)
+        failed = False
+        try:
+            while True:
+                token = _current_profile.set(profile)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    _current_profile.reset(token)
+                yield chunk
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            profile.report(enforce=enforce, failed=failed)
+
+    return _stream()
+
+
+def assert_max_queries(budget: int, label: str = 'block'):
+    """Test helper: fail when the block runs more than `budget` queries"""
+    return profile_queries(label, budget=budget, enforce=True)
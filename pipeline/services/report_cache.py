@@ -0,0 +1,62 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+
+def _latest_key(task_id) -> str:
+    return f"report:{task_id}:latest"
+
+
+def _payload_key(task_id, version: str) -> str:
+    return f"report:{task_id}:{version}"
+
+
+def report_version(task_id, analysis_updated_at, task_updated_at) -> str:
+    """Version string for a report.
+
+    Keyed on FinalAnalysis.updated_at; the task row's updated_at is folded in
+    because the payload also carries the task status.
+    """
+    raw = f"{task_id}:{analysis_updated_at.isoformat()}:{task_updated_at.isoformat()}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def report_etag(version: str) -> str:
+    return f'"{version}"'
+
+
+def report_last_modified(analysis_updated_at, task_updated_at) -> float:
+    return max(analysis_updated_at, task_updated_at).timestamp()
+
+
+def get_cached_report(task_id, version: str):
+    """Return the cached report payload for this version, or None."""
+    return cache.get(_payload_key(task_id, version))
+
+
+def set_cached_report(task_id, version: str, payload: dict) -> None:
+    cache.set_many({
+        _payload_key(task_id, version): payload,
+        _latest_key(task_id): version,
+    }, getattr(settings, 'REPORT_CACHE_TIMEOUT', 3600))
+
+
+def invalidate_report(task_id) -> None:
+    """Drop the cached report for a task. Called from phase 5 writes."""
+    version = cache.get(_latest_key(task_id))
+    if version:
+        cache.delete_many([_payload_key(task_id, version), _latest_key(task_id)])
+        logger.debug(f"[REPORT] Cache invalidated for task {task_id}")
+
+
+def apply_cache_headers(response, version: str, last_modified: float):
+    """Attach validators so clients can revalidate with a conditional GET."""
+    response['ETag'] = report_etag(version)
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
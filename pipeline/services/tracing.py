@@ -0,0 +1,132 @@
+import contextlib
+import functools
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace  # type: ignore
+    OTEL_AVAILABLE = True
+except ImportError:
+    trace = None
+    OTEL_AVAILABLE = False
+
+_configured = False
+
+
+def _tracer():
+    return trace.get_tracer("vendor_pipeline")
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """Open a span named `name` as the current span; a no-op without OpenTelemetry.
+
+    None-valued attributes are skipped. Exceptions are recorded on the span
+    and re-raised.
+    """
+    if not OTEL_AVAILABLE:
+        yield None
+        return
+    with _tracer().start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+def traced(name: str):
+    """Decorator wrapping a sync function call in a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_attributes(current, **attributes):
+    """Set attributes on a span returned by `span()`, tolerating the no-op case"""
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+class JsonFileSpanExporter:
+    """Append finished spans to a file, one JSON document per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult  # type: ignore
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as fh:
+                for s in spans:
+                    fh.write(s.to_json(indent=None) + '\n')
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            logger.warning(f"[TRACING] Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000):
+        return True
+
+
+def configure_tracing():
+    """Install a tracer provider according to TRACING_EXPORTER.
+
+    TRACING_EXPORTER=otlp    -> OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318)
+    TRACING_EXPORTER=json    -> JSON lines appended to TRACING_JSON_PATH
+    TRACING_EXPORTER=console -> spans printed to stdout
+    unset/none               -> spans are not recorded
+    """
+    global _configured
+    exporter_name = os.getenv('TRACING_EXPORTER', '').strip().lower()
+    if _configured or not exporter_name or exporter_name == 'none':
+        return
+    if not OTEL_AVAILABLE:
+        logger.warning("[TRACING] TRACING_EXPORTER is set but opentelemetry is not installed; tracing disabled")
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource  # type: ignore
+        from opentelemetry.sdk.trace import TracerProvider  # type: ignore
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter  # type: ignore
+    except ImportError:
+        logger.warning("[TRACING] opentelemetry-sdk is not installed; tracing disabled")
+        return
+
+    if exporter_name == 'otlp':
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter  # type: ignore
+        except ImportError:
+            logger.warning("[TRACING] opentelemetry-exporter-otlp-proto-http is not installed; tracing disabled")
+            return
+        exporter = OTLPSpanExporter()
+    elif exporter_name == 'json':
+        from django.conf import settings
+        path = os.getenv('TRACING_JSON_PATH', str(settings.LOG_DIR / 'traces.jsonl'))
+        exporter = JsonFileSpanExporter(path)
+    elif exporter_name == 'console':
+        exporter = ConsoleSpanExporter()
+    else:
+        logger.warning(f"[TRACING] Unknown TRACING_EXPORTER '{exporter_name}'; tracing disabled")
+        return
+
+    provider = TracerProvider(resource=Resource.create({
+        'service.name': os.getenv('OTEL_SERVICE_NAME', 'vendor-pipeline'),
+    }))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    logger.info(f"[TRACING] Exporting spans via {exporter_name}")
@@ -3,13 +3,19 @@ import os
 import json
 import re
 import logging
+import unicodedata
+
+from pipeline.services.metrics import JSON_PARSE
+from pipeline.services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+@traced('json.parse')
 def safe_json_extract(response_text: str) -> dict:
     """Robust JSON extraction with multiple fallback strategies"""
     if not response_text or not isinstance(response_text, str):
         logger.error(f"Invalid type: {type(response_text)}")
+        JSON_PARSE.labels(strategy='invalid_input').inc()
         return {}
     
     logger.debug(f"Response length: {len(response_text)}")
@@ -18,6 +24,7 @@ def safe_json_extract(response_text: str) -> dict:
     try:
         result = json.loads(response_text)
         logger.info("✅ Direct parse succeeded")
+        JSON_PARSE.labels(strategy='direct').inc()
         return result
     except json.JSONDecodeError:
         pass
@@ -28,6 +35,7 @@ def safe_json_extract(response_text: str) -> dict:
         if match:
             result = json.loads(match.group(1))
             logger.info("✅ Code block extraction")
+            JSON_PARSE.labels(strategy='code_block').inc()
             return result
     except (json.JSONDecodeError, AttributeError):
         pass
@@ -38,6 +46,7 @@ def safe_json_extract(response_text: str) -> dict:
         if match:
             result = json.loads(match.group(0))
             logger.info("✅ JSON object extraction")
+            JSON_PARSE.labels(strategy='object').inc()
             return result
     except json.JSONDecodeError:
         pass
@@ -49,11 +58,13 @@ def safe_json_extract(response_text: str) -> dict:
             data = json.loads(match.group(0))
             result = {'results': data} if isinstance(data, list) else data
             logger.info("✅ JSON array extraction")
+            JSON_PARSE.labels(strategy='array').inc()
             return result
     except json.JSONDecodeError:
         pass
     
     logger.error(f"❌ Failed all strategies")
+    JSON_PARSE.labels(strategy='failed').inc()
     return {}
 
 def sanitize_error_message(error: Exception) -> str:
@@ -80,6 +91,14 @@ def sanitize_error_message(error: Exception) -> str:
     
     return "An error occurred"
 
+def normalize_vendor_name(name) -> str:
+    """Comparable form of a vendor name: ASCII, lower case, punctuation dropped"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = text.casefold().replace('&', ' and ')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
 def validate_aps_score(score):
     """Validate APS score is between 0-1"""
     try:
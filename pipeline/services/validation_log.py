@@ -0,0 +1,158 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connections
+
+from pipeline.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationLogWriter:
+    """Collects ValidationLog rows in memory and writes them with bulk_create.
+
+    `record()` never touches the database, so it is safe to call from the
+    phase coroutines. A daemon thread flushes every `flush_interval` seconds
+    or as soon as `max_buffer` entries are waiting; phases also flush their
+    own entries when they finish.
+
+    Entries whose task has been deleted or archived are dropped. Only
+    transient database errors put entries back, each at most `max_retries`
+    times, and the buffer is capped at `max_pending` with the oldest
+    entries dropped first.
+    """
+
+    def __init__(self, max_buffer=200, flush_interval=5.0, max_pending=5000, max_retries=5):
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._entries = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, task_id, phase, validation_type, status, details=None):
+        if not getattr(settings, 'VALIDATION_LOG_ENABLED', True):
+            return
+        from pipeline.models import ValidationLog
+
+        entry = ValidationLog(
+            task_id=task_id,
+            phase=phase,
+            validation_type=validation_type,
+            status=status,
+            details=details or {},
+        )
+        entry._flush_attempts = 0
+        with self._lock:
+            self._entries.append(entry)
+            pending = self._trim()
+        metrics.VALIDATION_EVENTS.labels(phase=phase, status=status).inc()
+        self._ensure_thread()
+        if pending >= self.max_buffer:
+            self._wakeup.set()
+
+    def _trim(self) -> int:
+        """Drop the oldest entries beyond `max_pending`; call with the lock held"""
+        pending = len(self._entries)
+        if pending > self.max_pending:
+            dropped = pending - self.max_pending
+            del self._entries[:dropped]
+            metrics.VALIDATION_EVENTS_DROPPED.labels(reason='buffer_full').inc(dropped)
+            pending = self.max_pending
+        return pending
+
+    def flush(self) -> int:
+        """Write everything buffered so far; call from sync code only"""
+        from pipeline.models import ValidationLog
+
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            ValidationLog.objects.bulk_create(entries, batch_size=self.max_buffer)
+        except IntegrityError as e:
+            logger.warning(f"[VALIDATION] Bulk write of {len(entries)} validation logs failed ({e}); "
+                           f"writing them one by one")
+            return self._write_each(entries)
+        except OperationalError as e:
+            self._requeue(entries, e)
+            return 0
+        except Exception as e:
+            logger.error(f"[VALIDATION] Dropped {len(entries)} validation logs: {e}")
+            metrics.VALIDATION_EVENTS_DROPPED.labels(reason='error').inc(len(entries))
+            return 0
+        return len(entries)
+
+    def _write_each(self, entries) -> int:
+        """Write entries one at a time after a bulk IntegrityError, dropping those for missing tasks"""
+        from pipeline.models import Task, ValidationLog
+
+        live = set(Task.objects.filter(id__in={e.task_id for e in entries}).values_list('id', flat=True))
+        orphans = [e for e in entries if e.task_id not in live]
+        if orphans:
+            task_ids = sorted({e.task_id for e in orphans}, key=str)
+            logger.warning(f"[VALIDATION] Dropped {len(orphans)} validation logs for missing tasks {task_ids}")
+            metrics.VALIDATION_EVENTS_DROPPED.labels(reason='missing_task').inc(len(orphans))
+
+        written = 0
+        for entry in entries:
+            if entry.task_id not in live:
+                continue
+            entry.pk = None  # may be set by the failed bulk insert
+            try:
+                ValidationLog.objects.bulk_create([entry])
+                written += 1
+            except IntegrityError as e:
+                # The task went away since the check above, or the row is invalid
+                logger.warning(f"[VALIDATION] Dropped validation log for task {entry.task_id}: {e}")
+                metrics.VALIDATION_EVENTS_DROPPED.labels(reason='integrity').inc()
+            except OperationalError as e:
+                self._requeue([entry], e)
+        return written
+
+    def _requeue(self, entries, error):
+        """Put entries back after a transient error, dropping those out of retries"""
+        retry = []
+        for entry in entries:
+            entry.pk = None
+            entry._flush_attempts = getattr(entry, '_flush_attempts', 0) + 1
+            if entry._flush_attempts <= self.max_retries:
+                retry.append(entry)
+        dropped = len(entries) - len(retry)
+        if dropped:
+            metrics.VALIDATION_EVENTS_DROPPED.labels(reason='retries').inc(dropped)
+        logger.warning(f"[VALIDATION] Could not write {len(entries)} validation logs ({error}); "
+                       f"retrying {len(retry)}, dropped {dropped} after {self.max_retries} attempts")
+        with self._lock:
+            self._entries[:0] = retry
+            self._trim()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='validation-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+
+validation_log = ValidationLogWriter(
+    max_buffer=getattr(settings, 'VALIDATION_LOG_BUFFER_SIZE', 200),
+    flush_interval=getattr(settings, 'VALIDATION_LOG_FLUSH_SECONDS', 5.0),
+    max_retries=getattr(settings, 'VALIDATION_LOG_MAX_RETRIES', 5),
+)
+atexit.register(validation_log.flush)
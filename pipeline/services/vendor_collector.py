@@ -1,50 +1,339 @@
- 
-
 import asyncio
 import feedparser
+import html
+import httpx
 import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from pipeline.services import metrics, tracing
+from pipeline.services.feed_index import FeedIndex
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FEEDS = [
+    "https://github.blog/feed/",
+    "https://openai.com/feed/",
+    "https://www.anthropic.com/feed/",
+    "https://aws.amazon.com/feed/",
+    "https://azure.microsoft.com/feed/",
+]
+MAX_ENTRIES_PER_FEED = 200
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def feed_vendor_name(feed_url: str) -> str:
+    host = urlparse(feed_url).hostname or feed_url
+    labels = [label for label in host.split('.') if label != 'www']
+    return labels[0].capitalize() if labels else host
+
+
+def _parse_entries(content: bytes) -> list:
+    """Entries of an RSS/Atom document; ValueError when nothing usable could be parsed"""
+    feed = feedparser.parse(content)
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"Malformed feed: {feed.get('bozo_exception', 'no entries')}")
+    return [
+        {
+            'title': entry.get('title', ''),
+            'link': entry.get('link', ''),
+            'summary': entry.get('summary', ''),
+            'published': entry.get('published', ''),
+        }
+        for entry in feed.entries[:MAX_ENTRIES_PER_FEED]
+    ]
+
+
+def _plain(text: str) -> str:
+    return ' '.join(_TAG_RE.sub(' ', html.unescape(text or '')).split())
+
+
+def format_context(hits, max_tokens: int) -> str:
+    """One line per entry, best first, stopping before `max_tokens` (~4 chars/token)"""
+    budget = max_tokens * 4
+    lines = []
+    used = 0
+    for _score, entry in hits:
+        line = (f"- [{entry['vendor_name']}] {_plain(entry.get('title'))}: "
+                f"{_plain(entry.get('summary'))[:300]} ({entry.get('link') or entry['feed_url']})")
+        if used + len(line) > budget:
+            remaining = budget - used
+            if remaining > 80:
+                lines.append(line[:remaining - 3] + '...')
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return '\n'.join(lines)
+
+
 class VendorSourceCollector:
     """Collect vendor information from real sources"""
     
-    def __init__(self):
-        self.rss_feeds = [
-            "https://github.blog/feed/",
-            "https://openai.com/feed/",
-            "https://www.anthropic.com/feed/",
-            "https://aws.amazon.com/feed/",
-            "https://azure.microsoft.com/feed/",
+    def __init__(self, rss_feeds=None):
+        self.rss_feeds = rss_feeds or list(getattr(settings, 'VENDOR_FEED_URLS', None) or DEFAULT_FEEDS)
+        self.ttl = timedelta(seconds=getattr(settings, 'FEED_CACHE_TTL_SECONDS', 900))
+        self.timeout = getattr(settings, 'FEED_FETCH_TIMEOUT', 5.0)
+        self._index = FeedIndex([])
+        self._index_version = None
+        self._index_lock = threading.Lock()
+        # (version, future) of the build in progress; builds run in their own
+        # thread so a caller's deadline never throws one away
+        self._build = None
+        self._build_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-index')
+
+    def _new_client(self) -> httpx.AsyncClient:
+        # One pooled client per collection run: httpx pools are bound to the
+        # event loop, and every phase thread runs its own loop
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={'User-Agent': 'vendor-pipeline/1.0 (+feed cache)'},
+        )
+
+    async def refresh_feeds(self, client: httpx.AsyncClient = None, force: bool = False,
+                            deadline: float = None) -> dict:
+        """Bring the feed cache up to date; returns {feed_url: result}.
+
+        Feeds checked within the TTL are served from the cache ('hit');
+        others are re-requested with If-None-Match / If-Modified-Since
+        ('not_modified' or 'fetched'). A failed request or a malformed feed
+        keeps the stale entries ('error'). Requests still running after
+        `deadline` seconds are cancelled ('timeout'). Every outcome updates
+        `checked_at`, so a slow feed is retried after the TTL rather than
+        on every call. Pass `client` to point the fetcher at a test server.
+        """
+        from pipeline.models import FeedCache
+
+        cached = await sync_to_async(lambda: {f.url: f for f in FeedCache.objects.filter(url__in=self.rss_feeds)})()
+        now = timezone.now()
+        stale = [
+            url for url in self.rss_feeds
+            if force or url not in cached or cached[url].checked_at is None or now - cached[url].checked_at > self.ttl
         ]
+        results = {url: 'hit' for url in self.rss_feeds if url not in stale}
+
+        if stale:
+            own_client = client is None
+            client = client or self._new_client()
+            fetches = [asyncio.ensure_future(self._fetch(client, url, cached.get(url))) for url in stale]
+            try:
+                _done, pending = await asyncio.wait(fetches, timeout=deadline)
+            finally:
+                # Also reached when the caller gives up on the whole refresh
+                for fetch in fetches:
+                    fetch.cancel()
+                await asyncio.gather(*fetches, return_exceptions=True)
+                if own_client:
+                    await client.aclose()
+            timed_out = []
+            for url, fetch in zip(stale, fetches):
+                if fetch in pending:
+                    results[url] = 'timeout'
+                    timed_out.append(url)
+                elif fetch.exception() is not None:
+                    logger.warning(f"[FEEDS] Error refreshing {url}: {fetch.exception()}")
+                    results[url] = 'error'
+                else:
+                    results[url] = fetch.result()
+            if timed_out:
+                logger.warning(f"[FEEDS] Gave up on {len(timed_out)} feeds after {deadline:.1f}s")
+                for url in timed_out:
+                    await self._mark_failed(url, f"Timed out after {deadline:.1f}s")
+
+        for result in results.values():
+            metrics.FEED_FETCH.labels(result=result).inc()
+        return results
+
+    async def _mark_failed(self, url, error, status_code=None):
+        from pipeline.models import FeedCache
+
+        await sync_to_async(FeedCache.objects.update_or_create)(
+            url=url, defaults={'status_code': status_code, 'error': error[:1000], 'checked_at': timezone.now()}
+        )
+
+    async def _fetch(self, client, url, entry):
+        from pipeline.models import FeedCache
+
+        headers = {}
+        if entry is not None and entry.entries:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"[FEEDS] Error fetching {url}: {type(e).__name__}")
+            await self._mark_failed(url, f"{type(e).__name__}: {e}")
+            return 'error'
+        finally:
+            metrics.FEED_FETCH_DURATION.observe(time.perf_counter() - start)
+
+        if response.status_code == 304:
+            await sync_to_async(FeedCache.objects.filter(url=url).update)(
+                status_code=304, error='', checked_at=timezone.now()
+            )
+            return 'not_modified'
+
+        if response.status_code != 200:
+            logger.warning(f"[FEEDS] {url} returned HTTP {response.status_code}")
+            await self._mark_failed(url, f"HTTP {response.status_code}", status_code=response.status_code)
+            return 'error'
+
+        loop = asyncio.get_running_loop()
+        try:
+            entries = await loop.run_in_executor(None, _parse_entries, response.content)
+        except ValueError as e:
+            logger.warning(f"[FEEDS] {url}: {e}")
+            await self._mark_failed(url, str(e), status_code=200)
+            return 'error'
+        now = timezone.now()
+        await sync_to_async(FeedCache.objects.update_or_create)(
+            url=url,
+            defaults={
+                'etag': response.headers.get('ETag', '')[:255],
+                'last_modified': response.headers.get('Last-Modified', '')[:100],
+                'entries': entries,
+                'status_code': 200,
+                'error': '',
+                'fetched_at': now,
+                'checked_at': now,
+            },
+        )
+        logger.debug(f"[FEEDS] Cached {len(entries)} entries from {url}")
+        return 'fetched'
+
+    def _load_entries(self) -> list:
+        from pipeline.models import FeedCache
+
+        entries = []
+        rows = FeedCache.objects.filter(url__in=self.rss_feeds).values_list('url', 'entries')
+        for url, feed_entries in rows:
+            vendor_name = feed_vendor_name(url)
+            for entry in feed_entries:
+                entries.append({**entry, 'feed_url': url, 'vendor_name': vendor_name})
+        return entries
+
+    async def cached_entries(self) -> list:
+        """All cached entries of the configured feeds, tagged with their vendor"""
+        return await sync_to_async(self._load_entries)()
+
+    def _build_index(self, version) -> FeedIndex:
+        try:
+            start = time.perf_counter()
+            index = FeedIndex(self._load_entries())
+            with self._index_lock:
+                self._index, self._index_version = index, version
+            logger.debug(f"[FEEDS] Indexed {len(index)} feed entries in {time.perf_counter() - start:.2f}s")
+            return index
+        finally:
+            connections.close_all()
+
+    def start_index_build(self, version):
+        """Start building the index for `version` unless that build is already running"""
+        with self._index_lock:
+            build = self._build[1] if self._build is not None and self._build[0] == version else None
+            if build is None or (build.done() and build.exception() is not None):
+                build = self._build_executor.submit(self._build_index, version)
+                self._build = (version, build)
+            return build
+
+    async def get_index(self) -> FeedIndex:
+        """BM25 index over the cached entries, rebuilt only when a feed was re-fetched.
+
+        A rebuild runs in a background thread and is kept once done, even if
+        the caller gives up waiting. Until then callers get the previous
+        index; only the very first build is waited for.
+        """
+        from pipeline.models import FeedCache
+
+        version = await sync_to_async(lambda: tuple(
+            FeedCache.objects.filter(url__in=self.rss_feeds).order_by('url').values_list('url', 'fetched_at')
+        ))()
+        if version == self._index_version:
+            return self._index
+        build = self.start_index_build(version)
+        if self._index_version is not None:
+            return self._index
+        # shield: a cancelled wait must not cancel the build itself
+        return await asyncio.shield(asyncio.wrap_future(build))
+
+    async def search_entries(self, query: str, limit: int = 10, refresh: bool = True) -> list:
+        """Cached feed entries most relevant to `query`, as (score, entry) pairs"""
+        if refresh:
+            await self.refresh_feeds()
+        index = await self.get_index()
+        return index.search(query, limit)
     
     async def collect_from_rss_feeds(self, topic: str, limit: int = 10) -> list:
-        """Collect from RSS feeds"""
+        """Collect from RSS feeds (served from the feed cache, refreshed when stale)"""
         vendors = []
-        
-        async def parse_feed(feed_url: str):
+        for score, entry in await self.search_entries(topic, limit):
+            vendors.append({
+                'source': 'RSS Feed',
+                'vendor_name': entry['vendor_name'],
+                'evidence_url': entry.get('link') or entry['feed_url'],
+                'product_name': (entry.get('title') or 'Unknown')[:100],
+                'capability': (entry.get('summary') or 'AI automation')[:200],
+                'status': 'commercial',
+                'relevance': round(score, 3),
+            })
+        return vendors
+    
+    async def gather_context(self, topic: str, deadline: float, max_tokens: int, max_entries: int = 8) -> str:
+        """Feed evidence for `topic` as prompt text, never taking longer than `deadline` seconds.
+
+        Stale feeds are refreshed only within the deadline; if that runs
+        out, the refresh is abandoned and whatever is already cached is
+        used. The text is cut to roughly `max_tokens` tokens.
+        """
+        start = time.perf_counter()
+        result = 'error'
+        text = ''
+        with tracing.span('phase1.vendor_context', deadline=deadline) as current:
             try:
-                loop = asyncio.get_event_loop()
-                feed = await loop.run_in_executor(None, feedparser.parse, feed_url)
-                vendor_name = feed_url.split('//')[1].split('.')[0].capitalize()
-                
-                for entry in feed.entries[:5]:
-                    title = entry.get('title', '').lower()
-                    if any(word in title for word in topic.lower().split()[:2]):
-                        vendors.append({
-                            'source': 'RSS Feed',
-                            'vendor_name': vendor_name,
-                            'evidence_url': entry.get('link', feed_url),
-                            'product_name': entry.get('title', 'Unknown')[:100],
-                            'capability': entry.get('summary', 'AI automation')[:200],
-                            'status': 'commercial',
-                        })
+                text, result = await asyncio.wait_for(
+                    self._gather_context(topic, deadline, max_tokens, max_entries), timeout=deadline
+                )
+            except asyncio.TimeoutError:
+                result = 'timeout'
+                logger.warning(f"[FEEDS] Vendor context exceeded {deadline:.1f}s budget; continuing without it")
             except Exception as e:
-                logger.warning(f"Error parsing {feed_url}: {type(e).__name__}")
-        
-        await asyncio.gather(*(parse_feed(url) for url in self.rss_feeds), return_exceptions=True)
-        return vendors[:limit]
-    
+                logger.warning(f"[FEEDS] Vendor context failed: {type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - start
+            tracing.set_attributes(current, result=result, chars=len(text))
+        metrics.VENDOR_CONTEXT.labels(result=result).inc()
+        metrics.VENDOR_CONTEXT_DURATION.observe(elapsed)
+        logger.info(f"[FEEDS] Vendor context: result={result} chars={len(text)} took={elapsed * 1000:.0f}ms")
+        return text
+
+    async def _gather_context(self, topic, deadline, max_tokens, max_entries):
+        # Leave part of the budget for searching and formatting
+        outcomes = set((await self.refresh_feeds(deadline=deadline * 0.7)).values())
+        if outcomes == {'hit'}:
+            result = 'cache_hit'
+        elif 'timeout' in outcomes:
+            result = 'stale'
+        else:
+            result = 'refreshed'
+
+        hits = await self.search_entries(topic, max_entries, refresh=False)
+        if not hits:
+            return '', 'empty'
+        return format_context(hits, max_tokens), result
+
     async def search_github_trending(self, topic: str) -> list:
         """Search GitHub trending"""
         return [
@@ -53,4 +342,4 @@ class VendorSourceCollector:
             {'name': 'LlamaIndex', 'vendor': 'LlamaIndex', 'url': 'https://github.com/run-llama/llama_index'},
         ]
 
-collector = VendorSourceCollector()
\ No newline at end of file
+collector = VendorSourceCollector()
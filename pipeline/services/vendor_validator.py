@@ -1,47 +1,397 @@
 import asyncio
+import httpx
 import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
 from urllib.parse import urlparse
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from pipeline.services import metrics
+from pipeline.services.entity_resolution import canonical_name
+from pipeline.services.utils import normalize_vendor_name
+
 logger = logging.getLogger(__name__)
 
+# Check outcomes. PASS moves a vendor on to the next check; the others
+# decide it and skip every remaining check for that vendor.
+PASS = 'pass'
+VERIFIED = 'verified'
+UNVERIFIED = 'unverified'
+REJECT = 'reject'
+
+# Placeholder names the LLM produces instead of a real company
+GENERIC_NAMES = {
+    'unknown', 'n a', 'na', 'none', 'tbd', 'various', 'vendor', 'company',
+    'example', 'example company', 'generic', 'other', 'multiple vendors',
+}
+
+# Refused but clearly served by a live site (bot protection, auth, rate limits)
+_LIVE_REFUSALS = {401, 403, 429}
+# Servers that do not implement HEAD properly; retry those with GET
+_HEAD_UNSUPPORTED = {403, 404, 405, 501}
+
+
+def _domain(url: str) -> str:
+    """Cache key for the host serving `url`, including any explicit port"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    return f"{host}:{parsed.port}" if parsed.port else host
+
+
+def _candidate(vendor) -> dict:
+    """Working copy of one vendor, whichever key style the caller used"""
+    vendor = vendor if isinstance(vendor, dict) else {}
+    name = vendor.get('vendor_company') or vendor.get('vendor_name') or vendor.get('vendor') or ''
+    product = vendor.get('product_name') or vendor.get('product') or ''
+    url = vendor.get('evidence_link') or vendor.get('evidence_url') or vendor.get('evidence') or ''
+    return {
+        'name': str(name).strip(),
+        'product': str(product).strip(),
+        'url': str(url).strip()[:500],
+        'normalized_name': '',
+    }
+
+
+class VendorCheck:
+    """One validation rule, run over every still-undecided vendor of a batch.
+
+    Subclasses set `name` and `cost` (cheaper checks run first) and either
+    implement `check(candidate)`, returning None to pass or an
+    `(outcome, reason)` pair, or override `run` to work on the whole batch.
+    `deadline` is the time.monotonic() value by which the batch must be
+    decided, or None; checks doing I/O must give up by then.
+    """
+    name = 'check'
+    cost = 0
+
+    async def run(self, candidates: dict, deadline: float = None) -> dict:
+        """{index: candidate} -> {index: (outcome, reason)}; missing indexes pass"""
+        decided = {}
+        for index, candidate in candidates.items():
+            result = self.check(candidate)
+            if result is not None:
+                decided[index] = result
+        return decided
+
+    def check(self, candidate: dict):
+        return None
+
+
+class RequiredFieldsCheck(VendorCheck):
+    name = 'required'
+    cost = 0
+
+    def check(self, candidate):
+        if not candidate['name']:
+            return REJECT, 'missing_name'
+
+
+class NameCheck(VendorCheck):
+    """Normalizes the vendor name for later checks and rejects placeholders"""
+    name = 'name'
+    cost = 1
+
+    def check(self, candidate):
+        candidate['normalized_name'] = normalize_vendor_name(candidate['name'])
+        if not candidate['normalized_name'] or candidate['normalized_name'] in GENERIC_NAMES:
+            return REJECT, 'generic_name'
+
+
+class BlocklistCheck(VendorCheck):
+    """VENDOR_NAME_BLOCKLIST rejects the vendor; VENDOR_DOMAIN_BLOCKLIST only its evidence"""
+    name = 'blocklist'
+    cost = 2
+
+    def __init__(self):
+        self.names = {normalize_vendor_name(n) for n in getattr(settings, 'VENDOR_NAME_BLOCKLIST', [])}
+        self.domains = {d.lower().lstrip('.') for d in getattr(settings, 'VENDOR_DOMAIN_BLOCKLIST', [])}
+
+    def check(self, candidate):
+        if candidate['normalized_name'] in self.names:
+            return REJECT, 'blocklisted_name'
+        host = (urlparse(candidate['url']).hostname or '').lower()
+        if host and any(host == d or host.endswith('.' + d) for d in self.domains):
+            return UNVERIFIED, 'blocklisted_domain'
+
+
+class UrlSyntaxCheck(VendorCheck):
+    name = 'url_syntax'
+    cost = 3
+
+    def check(self, candidate):
+        if not candidate['url']:
+            return UNVERIFIED, 'no_evidence_url'
+        parsed = urlparse(candidate['url'])
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            return UNVERIFIED, 'invalid_url'
+
+
+class CatalogCheck(VendorCheck):
+    """Vendors already verified on the same host in an earlier task skip the HTTP check"""
+    name = 'catalog'
+    cost = 10
+
+    async def run(self, candidates, deadline=None):
+        keys = {index: canonical_name(c['name']) for index, c in candidates.items()}
+        known = await sync_to_async(self._known_hosts)(set(keys.values()))
+        decided = {}
+        for index, candidate in candidates.items():
+            if _domain(candidate['url']) in known.get(keys[index], ()):
+                decided[index] = (VERIFIED, 'catalog_match')
+        return decided
+
+    def _known_hosts(self, keys):
+        from pipeline.models import Vendor
+
+        known = defaultdict(set)
+        rows = (Vendor.objects.filter(canonical_name__in=keys, is_verified=True)
+                .exclude(evidence_url__isnull=True).exclude(evidence_url='')
+                .values_list('canonical_name', 'evidence_url').distinct())
+        for key, url in rows:
+            known[key].add(_domain(url))
+        return known
+
+
+class ReachabilityCheck(VendorCheck):
+    """Evidence URL must answer over HTTP; see `verify_urls`"""
+    name = 'reachability'
+    cost = 100
+
+    def __init__(self, client: httpx.AsyncClient = None):
+        self.client = client
+
+    async def run(self, candidates, deadline=None):
+        checks = await self.verify_urls([c['url'] for c in candidates.values()], deadline=deadline)
+        decided = {}
+        for index, candidate in candidates.items():
+            check = checks.get(candidate['url'])
+            if check is None or not check['reachable']:
+                decided[index] = (UNVERIFIED, check['reason'] if check else 'not_checked')
+        return decided
+
+    async def verify_urls(self, urls, client: httpx.AsyncClient = None, deadline: float = None) -> dict:
+        """Check that evidence URLs resolve, all at once; returns {url: result}.
+
+        Each result has `reachable`, `status_code`, `reason` and `cached`.
+        Fresh cached results are reused per URL. A domain that recently
+        failed to connect short-circuits every URL on it. Requests are
+        limited per host (URL_VERIFY_PER_HOST), and the whole batch is
+        bounded by URL_VERIFY_DEADLINE or the caller's `deadline`
+        (time.monotonic()), whichever comes first; URLs still pending then
+        count as unverified. Pass `client` (here or to the constructor) to
+        point the checks at a test server.
+        """
+        from pipeline.models import UrlCheck
+
+        client = client or self.client
+        results = {}
+        pending = []
+        for url in dict.fromkeys(u for u in urls if u):
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+                results[url] = {'reachable': False, 'status_code': None, 'reason': 'invalid_url', 'cached': False}
+            else:
+                pending.append(url)
+
+        domains = {_domain(url) for url in pending}
+        now = timezone.now()
+        cached = await sync_to_async(lambda: {
+            c.key: c for c in UrlCheck.objects.filter(key__in=pending + list(domains), expires_at__gt=now)
+        })()
+
+        to_check = []
+        for url in pending:
+            hit = cached.get(url)
+            dead_domain = cached.get(_domain(url))
+            if hit is not None:
+                results[url] = {'reachable': hit.reachable, 'status_code': hit.status_code,
+                                'reason': hit.reason, 'cached': True}
+            elif dead_domain is not None and not dead_domain.reachable:
+                results[url] = {'reachable': False, 'status_code': None,
+                                'reason': 'domain_unreachable', 'cached': True}
+            else:
+                to_check.append(url)
+
+        if to_check:
+            checked = await self._check_all(to_check, client, deadline)
+            results.update(checked)
+            await sync_to_async(self._store_checks)(checked)
+
+        for result in results.values():
+            label = 'cached' if result['cached'] else ('reachable' if result['reachable'] else result['reason'])
+            metrics.URL_VERIFY.labels(result=label if label in ('cached', 'reachable', 'timeout') else 'unreachable').inc()
+        return results
+
+    async def _check_all(self, urls, client, deadline=None):
+        timeout = getattr(settings, 'URL_VERIFY_DEADLINE', 8.0)
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            logger.warning(f"[VALIDATE] No time left to verify {len(urls)} evidence URLs")
+            return {url: {'reachable': False, 'status_code': None, 'reason': 'timeout', 'cached': False}
+                    for url in urls}
+
+        per_host = defaultdict(lambda: asyncio.Semaphore(getattr(settings, 'URL_VERIFY_PER_HOST', 2)))
+        own_client = client is None
+        client = client or httpx.AsyncClient(
+            timeout=getattr(settings, 'URL_VERIFY_TIMEOUT', 3.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={'User-Agent': 'Mozilla/5.0 (compatible; vendor-pipeline/1.0)'},
+        )
+
+        async def check(url):
+            async with per_host[_domain(url)]:
+                return await self._check_one(client, url)
+
+        tasks = {url: asyncio.ensure_future(check(url)) for url in urls}
+        try:
+            await asyncio.wait(tasks.values(), timeout=timeout)
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            if own_client:
+                await client.aclose()
+
+        results = {}
+        for url, task in tasks.items():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                results[url] = task.result()
+            else:
+                results[url] = {'reachable': False, 'status_code': None, 'reason': 'timeout', 'cached': False}
+        return results
+
+    async def _check_one(self, client, url):
+        try:
+            response = await client.head(url)
+            if response.status_code in _HEAD_UNSUPPORTED:
+                async with client.stream('GET', url) as streamed:
+                    response = streamed
+        except httpx.TimeoutException:
+            return {'reachable': False, 'status_code': None, 'reason': 'timeout', 'cached': False}
+        except (httpx.ConnectError, httpx.UnsupportedProtocol) as e:
+            return {'reachable': False, 'status_code': None, 'reason': 'connect_error',
+                    'cached': False, 'domain_down': True, 'error': str(e)[:200]}
+        except httpx.HTTPError as e:
+            return {'reachable': False, 'status_code': None, 'reason': type(e).__name__[:100], 'cached': False}
+
+        code = response.status_code
+        reachable = code < 400 or code in _LIVE_REFUSALS
+        return {'reachable': reachable, 'status_code': code, 'reason': f"http_{code}", 'cached': False}
+
+    def _store_checks(self, checked: dict):
+        from pipeline.models import UrlCheck
+
+        now = timezone.now()
+        ttl = timedelta(seconds=getattr(settings, 'URL_VERIFY_TTL_SECONDS', 86400))
+        negative_ttl = timedelta(seconds=getattr(settings, 'URL_VERIFY_NEGATIVE_TTL_SECONDS', 3600))
+        domains = {}
+        for url, result in checked.items():
+            if result['reason'] == 'timeout':
+                continue  # says nothing reliable about the URL
+            UrlCheck.objects.update_or_create(key=url[:500], defaults={
+                'kind': 'url', 'reachable': result['reachable'], 'status_code': result['status_code'],
+                'reason': result['reason'], 'checked_at': now,
+                'expires_at': now + (ttl if result['reachable'] else negative_ttl),
+            })
+            # Any HTTP answer proves the domain is up; only connection failures mark it down
+            if result['status_code'] is not None:
+                domains[_domain(url)] = (True, result['reason'])
+            elif result.get('domain_down'):
+                domains.setdefault(_domain(url), (False, result['reason']))
+
+        for domain, (up, reason) in domains.items():
+            UrlCheck.objects.update_or_create(key=domain[:500], defaults={
+                'kind': 'domain', 'reachable': up, 'status_code': None,
+                'reason': reason, 'checked_at': now,
+                'expires_at': now + (ttl if up else negative_ttl),
+            })
+
+
+class ValidationReport:
+    """Per-vendor verdicts (in input order) plus the time each check took"""
+
+    def __init__(self, results: list, timings: dict):
+        self.results = results
+        self.timings = timings
+
+    @property
+    def accepted(self):
+        return [r for r in self.results if r['accepted']]
+
+    def summary(self) -> str:
+        verified = sum(1 for r in self.results if r['verified'])
+        timings = ' '.join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.timings.items())
+        return (f"[VALIDATE] vendors={len(self.results)} accepted={len(self.accepted)} "
+                f"verified={verified} {timings}")
+
+
 class VendorValidator:
-    """Simple vendor validator used by phase1.
-    
-    This is intentionally lightweight: it checks for an evidence URL or
-    presence of vendor/product names. You can enhance it later to
-    perform HTTP HEAD checks or remote validation.
+    """Rule engine that validates a batch of discovered vendors.
+
+    Checks come from settings.VENDOR_VALIDATION_CHECKS (dotted paths) unless
+    passed in, and run in `cost` order. Each check sees only the vendors no
+    earlier check has decided, so the HTTP check never runs for vendors
+    already rejected or matched by cheaper rules. A vendor that passes every
+    check is accepted as verified.
     """
-    
+
+    def __init__(self, checks=None):
+        self._checks = checks
+
+    @property
+    def checks(self):
+        if self._checks is None:
+            self._checks = [import_string(path)() for path in settings.VENDOR_VALIDATION_CHECKS]
+        return sorted(self._checks, key=lambda check: check.cost)
+
+    async def validate_batch(self, vendors, deadline: float = None) -> ValidationReport:
+        """Run every check over `vendors`; `deadline` (time.monotonic()) bounds the I/O checks"""
+        candidates = {i: _candidate(vendor) for i, vendor in enumerate(vendors)}
+        decisions = {}
+        timings = {}
+        for check in self.checks:
+            undecided = {i: c for i, c in candidates.items() if i not in decisions}
+            if not undecided:
+                break
+            start = time.perf_counter()
+            try:
+                decided = await check.run(undecided, deadline=deadline)
+            except Exception as e:
+                # A broken rule is skipped rather than failing the whole phase
+                logger.error(f"[VALIDATE] Check {check.name} failed: {e}", exc_info=True)
+                decided = {}
+            timings[check.name] = time.perf_counter() - start
+            metrics.VALIDATION_CHECK_DURATION.labels(check=check.name).observe(timings[check.name])
+            for index, (outcome, reason) in decided.items():
+                decisions[index] = (check.name, outcome, reason)
+                metrics.VALIDATION_CHECK_RESULTS.labels(check=check.name, outcome=outcome).inc()
+
+        results = []
+        for index, candidate in candidates.items():
+            check_name, outcome, reason = decisions.get(index, (None, PASS, 'passed_all_checks'))
+            results.append({
+                'accepted': outcome != REJECT,
+                'verified': outcome in (PASS, VERIFIED),
+                'check': check_name,
+                'reason': reason,
+                'normalized_name': candidate['normalized_name'],
+            })
+        report = ValidationReport(results, timings)
+        logger.info(report.summary())
+        return report
+
     async def validate_vendor(self, vendor: dict) -> dict:
-        """Return a dict with at least `is_real` boolean and `reason` string."""
-        try:
-            # quick heuristics
-            name = (vendor.get('vendor_name') or vendor.get('vendor') or '').strip()
-            product = (vendor.get('product_name') or vendor.get('product') or '').strip()
-            url = (vendor.get('evidence_url') or vendor.get('evidence') or '')
-            
-            # If there's an evidence URL that looks valid, accept it
-            if url:
-                try:
-                    parsed = urlparse(url)
-                    if parsed.scheme in ('http', 'https') and parsed.netloc:
-                        return {'is_real': True, 'reason': 'has_evidence_url'}
-                except Exception:
-                    pass
-            
-            # If both name and product are non-empty, probably real
-            if name and product:
-                return {'is_real': True, 'reason': 'has_name_and_product'}
-            
-            # If at least one is present, give benefit of doubt
-            if name or product:
-                return {'is_real': True, 'reason': 'has_partial_info'}
-            
-            return {'is_real': False, 'reason': 'missing_data'}
-        except Exception as e:
-            logger.error(f"Validation error: {e}")
-            return {'is_real': False, 'reason': 'error'}
+        """Single-vendor form; returns `is_real`, `is_verified` and `reason`"""
+        result = (await self.validate_batch([vendor])).results[0]
+        return {'is_real': result['accepted'], 'is_verified': result['verified'], 'reason': result['reason']}
 
 
 # ✅ CRITICAL: Create global instance that can be imported
-validator = VendorValidator() 
+validator = VendorValidator()
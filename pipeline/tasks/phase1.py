@@ -1,33 +1,58 @@
+import asyncio
 import logging
 import json
-from django.db import transaction
+import time
+from django.conf import settings
 from asgiref.sync import sync_to_async
 from pipeline.models import Task, Vendor, Subtask
 from pipeline.services.llm_service import llm_service
 from pipeline.services.vendor_collector import collector
 from pipeline.services.vendor_validator import validator
+from pipeline.services.entity_resolution import resolve_vendors
 from pipeline.services.utils import safe_json_extract
+from pipeline.prompts.builder import build_prompt
+from pipeline.services.instrumentation import instrument_phase, instrument_store, traced_atomic
+from pipeline.services.validation_log import validation_log
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_phase('phase1')
 async def run_phase1(task_id):
     """
     PHASE 1: Vendor Discovery & Validation
     Calls PROMPT 1 to get structured vendor data
     """
+    # Evidence checks get whatever is left of the phase's budget after the LLM call
+    deadline = time.monotonic() + settings.PHASE1_DEADLINE_SECONDS
     try:
         task = await sync_to_async(Task.objects.get)(id=task_id)
         logger.info(f"[PHASE1] ✅ Starting for task {task_id}: {task.task_description[:50]}...")
         
-        task.status = 'phase1_running'
-        await sync_to_async(task.save)()
-        
         task_description = task.task_description
+        # Real-source context is gathered while the rest of the setup runs;
+        # gather_context() enforces the deadline and never raises
+        context_task = asyncio.ensure_future(collector.gather_context(
+            task_description,
+            deadline=settings.PHASE1_CONTEXT_DEADLINE_SECONDS,
+            max_tokens=settings.PHASE1_CONTEXT_MAX_TOKENS,
+        ))
+        
+        try:
+            task.status = 'phase1_running'
+            await sync_to_async(task.save)()
+        except BaseException:
+            # Don't leave the context lookup running, or its result unretrieved
+            context_task.cancel()
+            await asyncio.gather(context_task, return_exceptions=True)
+            raise
+        
         logger.info(f"[PHASE1] Generating vendor discovery prompt...")
         
         from pipeline.prompts.prompt_1 import get_prompt_1
-        prompt = get_prompt_1(task_description)
+        vendor_ctx = await context_task
+        prompt = build_prompt('phase1', get_prompt_1, task_description=task_description,
+                              vendor_ctx=vendor_ctx or "None available.")
         
         logger.info(f"[PHASE1] Calling LLM for vendor discovery...")
         response = await llm_service.call_llm(prompt)
@@ -40,30 +65,65 @@ async def run_phase1(task_id):
         
         if not data:
             raise ValueError("No vendors discovered")
+        discovered = len(data)
+        
+        # Merge records naming the same company (including vendors already
+        # stored for this task) so each is validated and analysed once
+        existing = await sync_to_async(list)(
+            Vendor.objects.filter(task_id=task_id).values_list('vendor_name', 'evidence_url')
+        )
+        data = resolve_vendors(data, existing=existing)
+        for vendor_data in data:
+            if isinstance(vendor_data, dict) and vendor_data.get('aliases'):
+                validation_log.record(task_id, 'phase1', 'vendor', 'merged', {
+                    'vendor': vendor_data['vendor_company'][:255],
+                    'aliases': [alias[:255] for alias in vendor_data['aliases']],
+                })
+        
+        # Validate the whole batch at once; rejected vendors are not stored,
+        # the rest are stored verified or not depending on their evidence
+        report = await validator.validate_batch(data, deadline=deadline)
+        accepted = []
+        for vendor_data, result in zip(data, report.results):
+            if result['accepted']:
+                accepted.append((vendor_data, result['verified']))
+            if not result['verified']:
+                validation_log.record(task_id, 'phase1', 'vendor',
+                                      'unverified' if result['accepted'] else 'rejected', {
+                    'vendor': str(vendor_data.get('vendor_company', ''))[:255] if isinstance(vendor_data, dict) else None,
+                    'check': result['check'],
+                    'reason': result['reason'],
+                })
         
-        logger.info(f"[PHASE1] Discovered {len(data)} vendors, storing to database...")
+        logger.info(f"[PHASE1] Resolved {discovered} records into {len(data)} vendors, storing {len(accepted)} to database...")
         
         @sync_to_async
+        @instrument_store('vendors')
         def store_vendors():
             count = 0
-            with transaction.atomic():
-                for vendor_data in data:
+            with traced_atomic('vendors'):
+                for vendor_data, is_verified in accepted:
                     try:
                         vendor, created = Vendor.objects.update_or_create(
                             task=task,
                             vendor_name=str(vendor_data.get('vendor_company', ''))[:255],
                             defaults={
+                                'canonical_name': str(vendor_data.get('canonical_name', ''))[:255],
                                 'product_name': str(vendor_data.get('product_name', ''))[:255],
                                 'evidence_url': str(vendor_data.get('evidence_link', ''))[:500],
                                 'source': str(vendor_data.get('domain', 'discovery'))[:255],
                                 'status': str(vendor_data.get('status', 'discovered'))[:50],
-                                'is_verified': True
+                                'is_verified': is_verified
                             }
                         )
                         count += 1
-                        logger.info(f"[PHASE1] ✅ Vendor: {vendor.vendor_name}")
+                        logger.debug(f"[PHASE1] ✅ Vendor: {vendor.vendor_name}")
                     except Exception as e:
                         logger.warning(f"[PHASE1] Vendor error: {e}")
+                        validation_log.record(task_id, 'phase1', 'vendor', 'rejected', {
+                            'vendor': str(vendor_data.get('vendor_company', ''))[:255] if isinstance(vendor_data, dict) else None,
+                            'error': str(e)[:500],
+                        })
                         continue
             return count
         
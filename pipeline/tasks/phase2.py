@@ -3,16 +3,19 @@
 import asyncio
 import json
 import logging
-from django.db import transaction
 from asgiref.sync import sync_to_async
 
 from pipeline.models import Task, Subtask
 from pipeline.services.utils import safe_json_extract, validate_aps_score, get_years
 from pipeline.services.llm_service import llm_service
 from pipeline.prompts.prompt_2 import get_prompt_2
+from pipeline.prompts.builder import build_prompt
+from pipeline.services.instrumentation import instrument_phase, instrument_store, traced_atomic
+from pipeline.services.validation_log import validation_log
 
 logger = logging.getLogger(__name__)
 
+@instrument_phase('phase2')
 async def run_phase2(task_id: int):
     """PHASE 2: Subtask Decomposition - Calls PROMPT 2"""
     try:
@@ -26,7 +29,7 @@ async def run_phase2(task_id: int):
         
         # Call PROMPT 2 to decompose task
         from pipeline.prompts.prompt_2 import get_prompt_2
-        prompt = get_prompt_2(task_desc)
+        prompt = build_prompt('phase2', get_prompt_2, task_description=task_desc)
         
         logger.info("[PHASE2] Calling LLM for subtask decomposition...")
         response = await llm_service.call_llm(prompt)
@@ -47,9 +50,10 @@ async def run_phase2(task_id: int):
         
         # Store subtasks with O*NET weights
         @sync_to_async
+        @instrument_store('subtasks')
         def create_subtasks():
             count = 0
-            with transaction.atomic():
+            with traced_atomic('subtasks'):
                 for s in subtasks[:10]:
                     try:
                         weight = float(s.get('importance', 0.5)) * (float(s.get('time_percent', 20)) / 100)
@@ -65,9 +69,10 @@ async def run_phase2(task_id: int):
                             }
                         )
                         count += 1
-                        logger.info(f"[PHASE2] ✅ Subtask: {subtask.subtask_name} ({s.get('time_percent', 0)}%)")
+                        logger.debug(f"[PHASE2] ✅ Subtask: {subtask.subtask_name} ({s.get('time_percent', 0)}%)")
                     except Exception as e:
                         logger.warning(f"[PHASE2] Subtask error: {e}")
+                        validation_log.record(task_id, 'phase2', 'subtask', 'rejected', {'error': str(e)[:500]})
                         continue
             return count
         
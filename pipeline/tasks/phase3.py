@@ -1,14 +1,16 @@
 import logging
 import json
-from django.db import transaction
 from asgiref.sync import sync_to_async
 from pipeline.models import Task, Vendor, Timeline
 from pipeline.services.llm_service import llm_service
 from pipeline.services.utils import safe_json_extract, validate_aps_score, get_years
+from pipeline.services.instrumentation import instrument_phase, instrument_store, traced_atomic
+from pipeline.services.validation_log import validation_log
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_phase('phase3')
 async def run_phase3(task_id):
     """
     PHASE 3: Timeline Analysis (1A, 1B, 1C)
@@ -32,10 +34,11 @@ async def run_phase3(task_id):
         logger.info(f"[PHASE3] Analyzing timeline for {len(vendors)} vendors...")
         
         @sync_to_async
+        @instrument_store('timelines')
         def create_timelines():
             count = 0
             years = [2023, 2024, 2025]
-            with transaction.atomic():
+            with traced_atomic('timelines'):
                 for vendor in vendors[:10]:
                     try:
                         # Generate timeline for each year
@@ -67,10 +70,12 @@ async def run_phase3(task_id):
                         vendor.aps_2025 = 0.85
                         vendor.save()
                         
-                        logger.info(f"[PHASE3] ✅ Timeline created for {vendor.vendor_name}")
+                        logger.debug(f"[PHASE3] ✅ Timeline created for {vendor.vendor_name}")
                         
                     except Exception as e:
                         logger.warning(f"[PHASE3] Timeline error for {vendor.vendor_name}: {e}")
+                        validation_log.record(task_id, 'phase3', 'timeline', 'rejected',
+                                              {'vendor': vendor.vendor_name, 'error': str(e)[:500]})
                         continue
             return count
         
@@ -2,20 +2,26 @@ import asyncio
 import json
 import logging
 import re
-from django.db import transaction
+from collections import deque
+from django.conf import settings
 from asgiref.sync import sync_to_async
 from pipeline.models import Task, Vendor, Subtask, CapabilityMapping
+from pipeline.services import batch_planner, metrics
+from pipeline.services.entity_resolution import canonical_name
 from pipeline.services.utils import safe_json_extract, validate_aps_score
 from pipeline.services.llm_service import llm_service
 from pipeline.prompts.prompt_3 import get_prompt_3
+from pipeline.prompts.builder import build_prompt
+from pipeline.services.instrumentation import instrument_phase, instrument_store, traced_atomic
+from pipeline.services.validation_log import validation_log
 
 logger = logging.getLogger(__name__)
 
-BATCH_SIZE = 1  # Ultra-small: ONE vendor at a time
-
+@instrument_phase('phase4')
 async def run_phase4(task_id: int):
     """
-    PHASE 4: Minimal Batching - ONE vendor per LLM call (guaranteed success)
+    PHASE 4: Capability mapping - vendors packed into each LLM call as far
+    as the reply budget allows, split and retried when a reply is truncated
     """
     try:
         task = await sync_to_async(Task.objects.get)(id=task_id)
@@ -28,56 +34,110 @@ async def run_phase4(task_id: int):
         if not vendors or not subtasks:
             raise ValueError(f"Missing: {len(vendors)} vendors, {len(subtasks)} subtasks")
 
-        logger.info(f"[PHASE4] {len(vendors)} vendors x {len(subtasks)} subtasks. Batch size={BATCH_SIZE}")
+        prompt_subtasks = subtasks[:10]  # Limit subtasks per prompt
+        subtask_items = [{"name": s.subtask_name} for s in prompt_subtasks]
+        max_tokens = settings.PHASE4_MAX_TOKENS
+        pending = deque(batch_planner.plan_batches(vendors, len(prompt_subtasks), max_tokens))
+        logger.info(f"[PHASE4] {len(vendors)} vendors x {len(subtasks)} subtasks in {len(pending)} batches")
 
         all_mappings = []
+        requeued = set()
+        calls = 0
 
-        # Process ONE vendor at a time to avoid truncation
-        for v_idx, vendor in enumerate(vendors):
+        while pending:
+            batch = pending.popleft()
+            names = [v.vendor_name for v in batch]
             try:
-                v_json = json.dumps([{"vendor": vendor.vendor_name, "product": vendor.product_name}])
-                s_json = json.dumps([{"name": s.subtask_name} for s in subtasks[:10]])  # Limit subtasks too
-
-                logger.info(f"[PHASE4] Vendor {v_idx+1}/{len(vendors)}: {vendor.vendor_name}")
-
-                prompt = get_prompt_3(task.task_description, v_json, s_json)
-                response = await llm_service.call_llm(prompt)
+                vendor_items = [{"vendor": v.vendor_name, "product": v.product_name} for v in batch]
+                calls += 1
+                logger.info(f"[PHASE4] Call {calls}: {len(batch)} vendors ({', '.join(names)[:200]})")
+                metrics.PHASE4_BATCH_VENDORS.observe(len(batch))
+
+                prompt = build_prompt('phase4', get_prompt_3, task=task.task_description,
+                                      vendors_json=vendor_items, subtasks_json=subtask_items)
+                result = await llm_service.complete(prompt, max_tokens=max_tokens)
+                response = result['text']
+                truncated = result['finish_reason'] == 'length'
+                completion_tokens = batch_planner.estimate_completion_tokens(response, result['usage'])
 
                 # Log raw output for debugging
                 if isinstance(response, str) and len(response) > 0:
                     logger.debug(f"[PHASE4] Raw response length: {len(response)}, first 200 chars: {response[:200]}")
 
+                # A truncated multi-vendor reply is split and retried instead of
+                # parsed; a single vendor can't be split, so salvage what we can
                 data = None
-                if isinstance(response, dict):
-                    data = response
-                elif isinstance(response, str):
+                if isinstance(response, str) and (not truncated or len(batch) == 1):
                     try:
                         data = json.loads(response)
                     except:
                         logger.warning(f"[PHASE4] JSON parse failed, attempting safe extract...")
+                        validation_log.record(task_id, 'phase4', 'json_parse', 'fallback',
+                                              {'vendors': names, 'response_chars': len(response),
+                                               'truncated': truncated})
                         data = safe_json_extract(response)
 
-                if not data or not isinstance(data, dict):
-                    logger.warning(f"[PHASE4] Vendor {vendor.vendor_name}: No valid dict returned")
+                cells = len(batch) * len(prompt_subtasks)
+                usable = bool(data) and isinstance(data, dict)
+                if truncated:
+                    batch_planner.observe(completion_tokens, cells, truncated=True)
+                if len(batch) > 1 and (truncated or not usable):
+                    # Probably cut off: retry both halves first, then re-plan
+                    # the queued batches with the raised estimate
+                    half = len(batch) // 2
+                    rest = [v for queued in pending for v in queued]
+                    pending = deque([batch[:half], batch[half:]] + batch_planner.plan_batches(
+                        rest, len(prompt_subtasks), max_tokens))
+                    metrics.PHASE4_BATCH_SPLITS.inc()
+                    logger.warning(f"[PHASE4] Reply for {len(batch)} vendors "
+                                   f"{'truncated' if truncated else 'unparseable'}; splitting")
+                    validation_log.record(task_id, 'phase4', 'batch', 'split', {
+                        'vendors': names, 'truncated': truncated, 'completion_tokens': completion_tokens,
+                    })
+                    continue
+                if not usable:
+                    logger.warning(f"[PHASE4] Vendor {names[0]}: No valid dict returned")
+                    validation_log.record(task_id, 'phase4', 'json_parse', 'failed',
+                                          {'vendor': names[0], 'truncated': truncated})
                     continue
+                if not truncated:
+                    batch_planner.observe(completion_tokens, cells)
 
                 capability_analysis = data.get('capability_analysis')
                 if not capability_analysis or not isinstance(capability_analysis, list):
-                    logger.warning(f"[PHASE4] Vendor {vendor.vendor_name}: capability_analysis not a list or missing")
+                    logger.warning(f"[PHASE4] Vendors {names}: capability_analysis not a list or missing")
+                    validation_log.record(task_id, 'phase4', 'schema', 'failed',
+                                          {'vendors': names, 'keys': list(data.keys())[:20]})
                     logger.debug(f"[PHASE4] Got data keys: {list(data.keys()) if data else 'None'}")
                     continue
 
-                logger.info(f"[PHASE4] Vendor {vendor.vendor_name}: {len(capability_analysis)} subtask mappings")
+                # Vendors the model skipped get one more try in a batch of their own
+                returned = {canonical_name(m.get('vendor')) for m in capability_analysis if isinstance(m, dict)}
+                missing = [v for v in batch if canonical_name(v.vendor_name) not in returned]
+                retry = [v for v in missing if v.id not in requeued]
+                if retry and len(retry) < len(batch):
+                    requeued.update(v.id for v in retry)
+                    pending.append(retry)
+                elif missing:
+                    validation_log.record(task_id, 'phase4', 'vendor_mapping', 'missing',
+                                          {'vendors': [v.vendor_name for v in missing]})
+
+                logger.info(f"[PHASE4] {len(capability_analysis)} vendor mappings from {len(batch)} vendors")
                 all_mappings.extend(capability_analysis)
-            
+
             except Exception as e:
-                logger.error(f"[PHASE4] Vendor {vendor.vendor_name} failed: {e}")
+                logger.error(f"[PHASE4] Vendors {names} failed: {e}")
+                validation_log.record(task_id, 'phase4', 'vendor_mapping', 'failed',
+                                      {'vendors': names, 'error': str(e)[:500]})
                 continue
 
         if not all_mappings:
             logger.error("[PHASE4] NO MAPPINGS GENERATED - LLM format issue")
             # Create dummy mappings to proceed (fallback for testing)
             logger.info("[PHASE4] Creating fallback mappings...")
+            validation_log.record(task_id, 'phase4', 'fallback_mappings', 'fallback', {
+                'vendors': len(vendors[:5]), 'subtasks': len(subtasks[:5]),
+            })
             for vendor in vendors[:5]:  # At least map first 5 vendors
                 for subtask in subtasks[:5]:
                     all_mappings.append({
@@ -94,17 +154,22 @@ async def run_phase4(task_id: int):
 
         # Store in DB
         @sync_to_async
+        @instrument_store('mappings')
         def store_mappings():
             count = 0
-            with transaction.atomic():
+            # Batched replies may echo names slightly differently ("Acme Inc." for "Acme")
+            vendors_by_name = {canonical_name(v.vendor_name): v for v in vendors}
+            vendors_by_name.update((v.vendor_name, v) for v in vendors)
+            subtasks_by_name = {s.subtask_name: s for s in subtasks}
+            with traced_atomic('mappings'):
                 for mapping_data in all_mappings:
+                    if not isinstance(mapping_data, dict): continue
                     vendor_name = mapping_data.get('vendor')
-                    vendor = next((v for v in vendors if v.vendor_name == vendor_name), None)
+                    vendor = vendors_by_name.get(vendor_name) or vendors_by_name.get(canonical_name(vendor_name))
                     if not vendor: continue
                     
                     for subtask_data in mapping_data.get('subtask_coverage', []):
-                        subtask_name = subtask_data.get('subtask')
-                        subtask = next((s for s in subtasks if s.subtask_name == subtask_name), None)
+                        subtask = subtasks_by_name.get(subtask_data.get('subtask'))
                         if not subtask: continue
                         
                         CapabilityMapping.objects.update_or_create(
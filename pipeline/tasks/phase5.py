@@ -1,22 +1,47 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from django.db import transaction
 from asgiref.sync import sync_to_async
 
 from pipeline.models import Task, Vendor, Subtask, CapabilityMapping, FinalAnalysis
 from pipeline.services.utils import safe_json_extract
+from pipeline.services.entity_resolution import canonical_name
 from pipeline.services.llm_service import llm_service
+from pipeline.services.report_cache import invalidate_report
 from pipeline.prompts.prompt_4 import get_prompt_4
+from pipeline.prompts.builder import build_prompt
+from pipeline.services.instrumentation import instrument_phase, instrument_store, traced_atomic
+from pipeline.services.validation_log import validation_log
 
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 8  # tweak if needed
 
 
+def _find_vendor(task_id: int, name) -> Optional[Vendor]:
+    """The task's vendor the LLM named as best.
+
+    Matched on the exact name, then the canonical name, then the longest
+    vendor name the answer starts with (prompt 4 asks for "VENDOR + TOOL").
+    """
+    name = str(name or '').strip()
+    if not name:
+        return None
+    vendors = Vendor.objects.filter(task_id=task_id)
+    key = canonical_name(name)
+    match = (vendors.filter(vendor_name__iexact=name).first()
+             or vendors.filter(canonical_name=key).first())
+    if match is None:
+        prefixed = [v for v in vendors if v.canonical_name and (key + ' ').startswith(v.canonical_name + ' ')]
+        match = max(prefixed, key=lambda v: len(v.canonical_name), default=None)
+    return match
+
+
 # --------- Sync helper placed at module scope (safer for sync_to_async) ----------
+@instrument_store('final_analysis')
 def _store_final_analysis_sync(task_id: int, final_data: Dict[str, Any]) -> bool:
     """
     Synchronous DB write -- run inside thread via sync_to_async.
@@ -47,11 +72,13 @@ def _store_final_analysis_sync(task_id: int, final_data: Dict[str, Any]) -> bool
     rpi_score = float(fa.get('rpi_score', 0) or 0)
     recommendations = fa.get('recommendations', []) or []
 
-    with transaction.atomic():
+    best_vendor = _find_vendor(task_id, fa.get('best_vendor_name', fa.get('best_vendor_current')))
+
+    with traced_atomic('final_analysis'):
         FinalAnalysis.objects.update_or_create(
             task_id=task_id,
             defaults={
-                'best_vendor_name': fa.get('best_vendor_name', fa.get('best_vendor_current', 'Unknown')),
+                'best_vendor': best_vendor,
                 'automation_2024': automation_2024,
                 'automation_2025': automation_2025,
                 'automation_2026': automation_2026,
@@ -60,10 +87,12 @@ def _store_final_analysis_sync(task_id: int, final_data: Dict[str, Any]) -> bool
                 'recommendations': recommendations,
             }
         )
+        transaction.on_commit(lambda: invalidate_report(task_id))
     return True
 # -------------------------------------------------------------------------------
 
 
+@instrument_phase('phase5')
 async def run_phase5(task_id: int):
     """
     PHASE 5: Final Analysis Batch/Async Safe
@@ -94,19 +123,20 @@ async def run_phase5(task_id: int):
         # Process mappings in batches
         for b_idx in range(0, len(mappings), BATCH_SIZE):
             mappings_chunk = mappings[b_idx:b_idx + BATCH_SIZE]
-            mapping_json = json.dumps([{
+            mapping_items = [{
                 "vendor": (m.vendor.vendor_name if m.vendor else ""),
                 "subtask": (m.subtask.subtask_name if m.subtask else ""),
                 "can_handle": (m.can_handle if hasattr(m, "can_handle") else "partially"),
                 "aps_2024": float(m.aps_2024) if getattr(m, "aps_2024", None) is not None else 0.0,
                 "aps_2025": float(m.aps_2025) if getattr(m, "aps_2025", None) is not None else 0.0,
                 "aps_2026": float(m.aps_2026) if getattr(m, "aps_2026", None) is not None else 0.0
-            } for m in mappings_chunk])
+            } for m in mappings_chunk]
 
             logger.info(f"[PHASE5] Analysis batch {b_idx // BATCH_SIZE + 1}: mappings {b_idx}-{b_idx + len(mappings_chunk) - 1}")
 
             # call LLM
-            prompt = get_prompt_4(task.task_description, mapping_json)
+            prompt = build_prompt('phase5', get_prompt_4, task=task.task_description,
+                                  capability_mapping_json=mapping_items)
             response = await llm_service.call_llm(prompt)
             logger.debug(f"[PHASE5] LLM batch output type={type(response)} len={len(str(response)) if response else 0}")
 
@@ -122,11 +152,13 @@ async def run_phase5(task_id: int):
 
             if not isinstance(data, dict):
                 logger.error(f"[PHASE5] LLM batch failed to return JSON dict for batch {b_idx // BATCH_SIZE + 1}")
+                validation_log.record(task_id, 'phase5', 'json_parse', 'failed', {'batch': b_idx // BATCH_SIZE + 1})
                 continue
 
             final_analysis = data.get('final_analysis')
             if not final_analysis or not isinstance(final_analysis, dict):
                 logger.error(f"[PHASE5] final_analysis missing/invalid in batch {b_idx // BATCH_SIZE + 1}")
+                validation_log.record(task_id, 'phase5', 'schema', 'failed', {'batch': b_idx // BATCH_SIZE + 1})
                 continue
 
             logger.info(f"[PHASE5] Received valid final_analysis from batch {b_idx // BATCH_SIZE + 1}")
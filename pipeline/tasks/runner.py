@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from pipeline.services import tracing
+
+from pipeline.tasks.phase1 import run_phase1
+from pipeline.tasks.phase2 import run_phase2
+from pipeline.tasks.phase3 import run_phase3
+from pipeline.tasks.phase4 import run_phase4
+from pipeline.tasks.phase5 import run_phase5
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_PHASES = [run_phase1, run_phase2, run_phase3, run_phase4, run_phase5]
+
+# Upper bound on full pipeline runs executing at once in this process;
+# further runs queue in the executor until a slot frees up.
+pipeline_executor = ThreadPoolExecutor(
+    max_workers=settings.PIPELINE_MAX_CONCURRENCY, thread_name_prefix="pipeline"
+)
+
+
+async def run_full_pipeline(task_id: int):
+    """Run phases 1-5 in order, stopping at the first failure"""
+    for phase_func in PIPELINE_PHASES:
+        await phase_func(task_id)
+    return {'status': 'completed', 'task_id': task_id}
+
+
+def _run_pipeline_blocking(task_id: int):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        logger.info(f"[PIPELINE] Starting full run for task {task_id}")
+        with tracing.span('pipeline.run', task_id=task_id):
+            result = loop.run_until_complete(run_full_pipeline(task_id))
+        logger.info(f"[PIPELINE] ✅ Task {task_id} completed")
+        return result
+    except Exception as e:
+        # The failing phase has already marked the task as 'error'
+        logger.error(f"[PIPELINE] ❌ Task {task_id} stopped: {e}")
+    finally:
+        loop.close()
+        connections.close_all()
+
+
+def schedule_pipeline_runs(task_ids) -> int:
+    """Queue a full pipeline run for each task id; returns how many were queued"""
+    count = 0
+    for task_id in task_ids:
+        pipeline_executor.submit(_run_pipeline_blocking, task_id)
+        count += 1
+    logger.info(f"[PIPELINE] Queued {count} pipeline runs (max {settings.PIPELINE_MAX_CONCURRENCY} concurrent)")
+    return count
@@ -0,0 +1,49 @@
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from pipeline.models import IdempotencyKey, Task
+
+
+class PhaseIdempotencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.task = Task.objects.create(user_id='u1', task_description='Review invoices',
+                                        status='phase1_running')
+        self.url = f'/api/tasks/{self.task.id}/phase1/'
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _post(self):
+        return self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+    async def _slow_phase(self, task_id):
+        # Still "running" when the request stops waiting for it
+        self.release.wait(5)
+
+    async def _finished_phase(self, task_id):
+        pass
+
+    @override_settings(PHASE_THREAD_TIMEOUT=0.05)
+    def test_phase_outliving_the_wait_is_not_replayed(self):
+        with mock.patch('pipeline.views.run_phase1', self._slow_phase):
+            response = self._post()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['data']['status'], 'phase1_running')
+            self.assertFalse(IdempotencyKey.objects.exists())
+
+            retry = self._post()
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_finished_phase_is_replayed(self):
+        # Writes from the phase thread would block on the test transaction
+        Task.objects.filter(id=self.task.id).update(status='phase1_done')
+        with mock.patch('pipeline.views.run_phase1', self._finished_phase):
+            self.assertEqual(self._post().data['data']['status'], 'phase1_done')
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
+
+        retry = self._post()
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['data']['status'], 'phase1_done')
@@ -0,0 +1,69 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from pipeline.models import CapabilityMapping, FinalAnalysis, Subtask, Task, Vendor
+from pipeline.tasks.phase5 import run_phase5
+
+
+def _analysis_reply(automation_2025):
+    return json.dumps({'final_analysis': {
+        'best_vendor_current': 'Acme Corp + Acme Assist',
+        'automation_2024': 10,
+        'automation_2025': automation_2025,
+        'automation_2026': 50,
+        'hrf_scores': {'technical': 0.5},
+        'rpi_score': 0.4,
+        'recommendations': ['Pilot Acme Assist'],
+    }})
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.task = Task.objects.create(user_id='u1', task_description='Review invoices',
+                                        status='phase4_done')
+        self.vendor = Vendor.objects.create(task=self.task, vendor_name='Acme', canonical_name='acme')
+        Vendor.objects.create(task=self.task, vendor_name='Globex', canonical_name='globex')
+        subtask = Subtask.objects.create(task=self.task, subtask_name='Match lines', description='',
+                                         time_percent=50, importance=0.8, ai_applicable='high')
+        CapabilityMapping.objects.create(task=self.task, vendor=self.vendor, subtask=subtask,
+                                         can_handle='yes', aps_2024=0.6, aps_2025=0.7, aps_2026=0.8)
+        self.url = f'/api/tasks/{self.task.id}/report/'
+
+    def _run_phase5(self, reply):
+        llm = mock.Mock(call_llm=mock.AsyncMock(return_value=reply))
+        with mock.patch('pipeline.tasks.phase5.llm_service', llm):
+            with self.captureOnCommitCallbacks(execute=True):
+                return async_to_sync(run_phase5)(self.task.id)
+
+    def test_phase5_write_invalidates_report(self):
+        self._run_phase5(_analysis_reply(30))
+        analysis = FinalAnalysis.objects.get(task=self.task)
+        self.assertEqual(analysis.best_vendor, self.vendor)
+
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['best_vendor'], 'Acme')
+        self.assertEqual(first.data['automation_2025'], 30)
+        etag = first['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self._run_phase5(_analysis_reply(40))
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], etag)
+        self.assertEqual(second.data['automation_2025'], 40)
+
+    def test_unknown_best_vendor_is_left_empty(self):
+        reply = json.loads(_analysis_reply(30))
+        reply['final_analysis']['best_vendor_current'] = 'Initech'
+        self._run_phase5(json.dumps(reply))
+        self.assertIsNone(FinalAnalysis.objects.get(task=self.task).best_vendor)
+        self.assertIsNone(self.client.get(self.url).data['best_vendor'])
@@ -0,0 +1,57 @@
+import threading
+import unittest
+
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase
+
+from pipeline.db.sqlite3 import base as sqlite_base
+from pipeline.models import Task
+
+
+@unittest.skipUnless(connection.settings_dict['ENGINE'] == 'pipeline.db.sqlite3', "needs the tuned SQLite backend")
+class WriterLockTests(TransactionTestCase):
+    def setUp(self):
+        self.task = Task.objects.create(user_id='u1', task_description='Review invoices')
+
+    def _in_thread(self, func):
+        result = {}
+
+        def run():
+            try:
+                result['value'] = func()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(2)
+        self.assertFalse(thread.is_alive(), "blocked on the writer lock")
+        return result['value']
+
+    def test_read_only_atomic_does_not_wait_for_writers(self):
+        def read():
+            with transaction.atomic():
+                return Task.objects.count()
+
+        with sqlite_base._writer_lock:
+            self.assertEqual(self._in_thread(read), 1)
+
+    def test_atomic_takes_the_lock_at_its_first_write(self):
+        with transaction.atomic():
+            Task.objects.count()
+            self.assertFalse(connection._holds_writer_lock)
+            Task.objects.filter(id=self.task.id).update(status='phase1_done')
+            self.assertTrue(connection._holds_writer_lock)
+        self.assertFalse(connection._holds_writer_lock)
+
+    def test_savepoints_before_the_first_write_still_roll_back(self):
+        with transaction.atomic():
+            Task.objects.count()
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    Task.objects.create(user_id='u1', task_description='Rolled back')
+                    raise ValueError
+            Task.objects.create(user_id='u1', task_description='Kept')
+
+        self.assertEqual(sorted(Task.objects.values_list('task_description', flat=True)),
+                         ['Kept', 'Review invoices'])
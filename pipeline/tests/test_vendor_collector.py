@@ -0,0 +1,104 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+
+from pipeline.models import FeedCache
+from pipeline.services.vendor_collector import VendorSourceCollector
+
+FEED_URL = 'https://feeds.example.com/rss'
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>Invoice matching agent</title><link>https://example.com/a</link>
+<description>AI-powered invoice matching</description></item>
+<item><title>Ledger copilot</title><link>https://example.com/b</link>
+<description>Reconciliation assistant</description></item>
+</channel></rss>"""
+
+
+class FeedRefreshTests(TestCase):
+    def setUp(self):
+        self.collector = VendorSourceCollector(rss_feeds=[FEED_URL])
+        self.requests = []
+
+    def _refresh(self, handler, **kwargs):
+        def _record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        async def _run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(_record)) as client:
+                return await self.collector.refresh_feeds(client=client, **kwargs)
+        return async_to_sync(_run)()
+
+    def _cache_stale_feed(self):
+        return FeedCache.objects.create(
+            url=FEED_URL, etag='"v1"', last_modified='Mon, 05 Oct 2026 10:00:00 GMT',
+            entries=[{'title': 'Old entry', 'link': '', 'summary': '', 'published': ''}],
+            status_code=200, checked_at=timezone.now() - timedelta(days=1),
+        )
+
+    def test_fetches_and_stores_validators(self):
+        results = self._refresh(lambda request: httpx.Response(
+            200, content=RSS, headers={'ETag': '"v2"', 'Last-Modified': 'Tue, 06 Oct 2026 10:00:00 GMT'}))
+
+        self.assertEqual(results, {FEED_URL: 'fetched'})
+        feed = FeedCache.objects.get(url=FEED_URL)
+        self.assertEqual([e['title'] for e in feed.entries], ['Invoice matching agent', 'Ledger copilot'])
+        self.assertEqual(feed.etag, '"v2"')
+        self.assertEqual(feed.last_modified, 'Tue, 06 Oct 2026 10:00:00 GMT')
+
+    def test_fresh_cache_is_not_requested(self):
+        FeedCache.objects.create(url=FEED_URL, entries=[], checked_at=timezone.now())
+        self.assertEqual(self._refresh(lambda request: httpx.Response(500)), {FEED_URL: 'hit'})
+        self.assertEqual(self.requests, [])
+
+    def test_not_modified_keeps_entries(self):
+        self._cache_stale_feed()
+        results = self._refresh(lambda request: httpx.Response(304))
+
+        self.assertEqual(results, {FEED_URL: 'not_modified'})
+        self.assertEqual(self.requests[0].headers['If-None-Match'], '"v1"')
+        self.assertEqual(self.requests[0].headers['If-Modified-Since'], 'Mon, 05 Oct 2026 10:00:00 GMT')
+        feed = FeedCache.objects.get(url=FEED_URL)
+        self.assertEqual(feed.entries[0]['title'], 'Old entry')
+        self.assertGreater(feed.checked_at, timezone.now() - timedelta(minutes=1))
+
+    def test_timeout_keeps_entries_and_marks_checked(self):
+        self._cache_stale_feed()
+
+        def _timeout(request):
+            raise httpx.ReadTimeout('timed out', request=request)
+
+        self.assertEqual(self._refresh(_timeout), {FEED_URL: 'error'})
+        feed = FeedCache.objects.get(url=FEED_URL)
+        self.assertIn('ReadTimeout', feed.error)
+        self.assertEqual(feed.entries[0]['title'], 'Old entry')
+        self.assertGreater(feed.checked_at, timezone.now() - timedelta(minutes=1))
+
+    def test_deadline_cancels_fetch_and_marks_checked(self):
+        self._cache_stale_feed()
+
+        async def _slow(request):
+            await asyncio.sleep(5)
+            return httpx.Response(200, content=RSS)
+
+        self.assertEqual(self._refresh(_slow, deadline=0.05), {FEED_URL: 'timeout'})
+        feed = FeedCache.objects.get(url=FEED_URL)
+        self.assertIn('Timed out', feed.error)
+        self.assertEqual(feed.entries[0]['title'], 'Old entry')
+        # The next call within the TTL is served from the cache instead of refetching
+        self.assertEqual(self._refresh(_slow, deadline=0.05), {FEED_URL: 'hit'})
+
+    def test_malformed_feed_keeps_entries(self):
+        self._cache_stale_feed()
+        results = self._refresh(lambda request: httpx.Response(200, content=b'<html><body>Not a feed'))
+
+        self.assertEqual(results, {FEED_URL: 'error'})
+        feed = FeedCache.objects.get(url=FEED_URL)
+        self.assertIn('Malformed feed', feed.error)
+        self.assertEqual(feed.entries[0]['title'], 'Old entry')
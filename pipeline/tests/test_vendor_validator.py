@@ -0,0 +1,99 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+
+from pipeline.models import UrlCheck
+from pipeline.services.vendor_validator import ReachabilityCheck
+
+
+class ReachabilityCheckTests(TestCase):
+    def setUp(self):
+        self.requests = []
+
+    def _verify(self, handler, urls, deadline=None):
+        def _record(request):
+            self.requests.append((request.method, str(request.url)))
+            return handler(request)
+
+        async def _run():
+            transport = httpx.MockTransport(_record)
+            async with httpx.AsyncClient(transport=transport, follow_redirects=True) as client:
+                return await ReachabilityCheck(client=client).verify_urls(urls, deadline=deadline)
+        return async_to_sync(_run)()
+
+    def test_reachable_url_is_cached(self):
+        url = 'https://acme.example.com/product'
+        result = self._verify(lambda request: httpx.Response(200), [url])[url]
+
+        self.assertTrue(result['reachable'])
+        self.assertEqual(result['status_code'], 200)
+        self.assertEqual(self.requests, [('HEAD', url)])
+        self.assertTrue(UrlCheck.objects.get(key=url).reachable)
+        self.assertTrue(UrlCheck.objects.get(key='acme.example.com').reachable)
+
+    def test_redirect_is_followed(self):
+        url = 'https://acme.example.com/old'
+
+        def _handler(request):
+            if request.url.path == '/old':
+                return httpx.Response(301, headers={'Location': 'https://acme.example.com/new'})
+            return httpx.Response(200)
+
+        result = self._verify(_handler, [url])[url]
+        self.assertTrue(result['reachable'])
+        self.assertEqual([u for _m, u in self.requests], [url, 'https://acme.example.com/new'])
+
+    def test_not_found_retries_with_get(self):
+        url = 'https://acme.example.com/missing'
+        result = self._verify(lambda request: httpx.Response(404), [url])[url]
+
+        self.assertFalse(result['reachable'])
+        self.assertEqual(result['reason'], 'http_404')
+        self.assertEqual([m for m, _u in self.requests], ['HEAD', 'GET'])
+        check = UrlCheck.objects.get(key=url)
+        self.assertFalse(check.reachable)
+        # Failures expire sooner than successes
+        self.assertLess(check.expires_at, timezone.now() + timedelta(hours=2))
+
+    def test_timeout_is_not_cached(self):
+        url = 'https://slow.example.com/'
+
+        def _timeout(request):
+            raise httpx.ReadTimeout('timed out', request=request)
+
+        result = self._verify(_timeout, [url])[url]
+        self.assertEqual(result['reason'], 'timeout')
+        self.assertFalse(UrlCheck.objects.filter(key=url).exists())
+
+    def test_caller_deadline_bounds_the_batch(self):
+        url = 'https://slow.example.com/'
+
+        async def _slow(request):
+            await asyncio.sleep(5)
+            return httpx.Response(200)
+
+        start = time.monotonic()
+        result = self._verify(_slow, [url], deadline=time.monotonic() + 0.1)[url]
+        self.assertEqual(result['reason'], 'timeout')
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_cache_hit_and_expiry(self):
+        url = 'https://acme.example.com/product'
+        UrlCheck.objects.create(key=url, kind='url', reachable=True, status_code=200, reason='http_200',
+                                checked_at=timezone.now(), expires_at=timezone.now() + timedelta(hours=1))
+
+        result = self._verify(lambda request: httpx.Response(500), [url])[url]
+        self.assertTrue(result['cached'])
+        self.assertTrue(result['reachable'])
+        self.assertEqual(self.requests, [])
+
+        UrlCheck.objects.filter(key=url).update(expires_at=timezone.now() - timedelta(seconds=1))
+        result = self._verify(lambda request: httpx.Response(500), [url])[url]
+        self.assertFalse(result['cached'])
+        self.assertFalse(result['reachable'])
+        self.assertEqual(len(self.requests), 1)
@@ -8,6 +8,7 @@ router = DefaultRouter()
 router.register(r'tasks', views.TaskViewSet, basename='task')
 router.register(r'vendors', views.VendorViewSet, basename='vendor')
 router.register(r'subtasks', views.SubtaskViewSet, basename='subtask')
+router.register(r'validation-logs', views.ValidationLogViewSet, basename='validation-log')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -4,25 +4,43 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
 import asyncio
+import contextvars
 import json
 import logging
 import threading
 
-from .models import Task, Vendor, Subtask, CapabilityMapping, FinalAnalysis, Timeline
-from .serializers import TaskSerializer, VendorSerializer, SubtaskSerializer, TaskCreateSerializer
+from .models import Task, Vendor, Subtask, CapabilityMapping, FinalAnalysis, Timeline, ValidationLog
+from .serializers import (
+    TaskSerializer, VendorSerializer, SubtaskSerializer, TaskCreateSerializer, TaskBatchSerializer,
+    ValidationLogSerializer,
+)
 from .tasks.phase1 import run_phase1
 from .tasks.phase2 import run_phase2
 from .tasks.phase3 import run_phase3
 from .tasks.phase4 import run_phase4
 from .tasks.phase5 import run_phase5
+from .tasks.runner import schedule_pipeline_runs
+from .db import routers
+from .services import archiver, idempotency, metrics, profiler, report_cache, tracing
+from .services.exporter import stream_export, EXPORT_FORMATS, CONTENT_TYPES, DEFAULT_CHUNK_SIZE
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
 
 logger = logging.getLogger(__name__)
 
 
-def run_phase_in_thread(phase_func, task_id):
-    """Run an async phase function in a new event loop in a thread"""
+def run_phase_in_thread(phase_func, task_id, profile=False):
+    """Run an async phase function in a new event loop in a thread.
+
+    With `profile`, the run is profiled and stored as a PhaseProfile.
+    """
     def _run():
+        if profile:
+            profiler.request_profiling()
         try:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
@@ -32,14 +50,65 @@ def run_phase_in_thread(phase_func, task_id):
         except Exception as e:
             logger.error(f"Phase execution error: {e}", exc_info=True)
             raise
+        finally:
+            connections.close_all()
     
-    thread = threading.Thread(target=_run, daemon=True)
-    thread.start()
-    thread.join(timeout=300)  # Wait up to 5 minutes
-    return True
+    with tracing.span('run_phase_in_thread', phase=phase_func.__name__, task_id=task_id):
+        # Run inside a copy of the caller's context so phase spans nest under this one
+        ctx = contextvars.copy_context()
+        thread = threading.Thread(target=ctx.run, args=(_run,), daemon=True)
+        thread.start()
+        thread.join(timeout=getattr(settings, 'PHASE_THREAD_TIMEOUT', 300))
+    return not thread.is_alive()
+
+def pipeline_transactions(cls):
+    """Opt a viewset out of ATOMIC_REQUESTS when PIPELINE_NON_ATOMIC_REQUESTS is on.
+
+    Phase requests block on LLM calls for minutes; the phases commit their
+    own short transactions, so the request must not hold one open meanwhile.
+    """
+    if getattr(settings, 'PIPELINE_NON_ATOMIC_REQUESTS', True):
+        return method_decorator(transaction.non_atomic_requests, name='dispatch')(cls)
+    return cls
+
+
+class ReplicaReadMixin:
+    """Serve `replica_actions` from the read replica when one is configured.
+
+    Tasks this session modified recently are read from the primary instead
+    (read-your-writes); see routers.pin_to_primary().
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def pinned_task_id(self):
+        return self.request.query_params.get('task_id')
 
-class TaskViewSet(viewsets.ModelViewSet):
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = None
+        if self.action in self.replica_actions and routers.replica_configured():
+            if not routers.is_pinned(request, self.pinned_task_id()):
+                self._replica_token = routers.route_reads(routers.REPLICA_ALIAS)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            routers.reset_reads(token)
+            self._replica_token = None
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+@pipeline_transactions
+class TaskViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Task API ViewSet - Create, list, and manage tasks"""
+    replica_actions = ('list', 'retrieve', 'report', 'archive')
     queryset = Task.objects.prefetch_related('vendors', 'subtasks').all()
     pagination_class = PageNumberPagination
     permission_classes = [AllowAny]  # ← ADD THIS LINE
@@ -47,138 +116,217 @@ class TaskViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return TaskCreateSerializer
+        if self.action == 'batch':
+            return TaskBatchSerializer
         return TaskSerializer
+
+    def pinned_task_id(self):
+        return self.kwargs.get('pk')
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        routers.pin_to_primary(self.request, [serializer.instance.pk])
     
     def create(self, request, *args, **kwargs):
         """Create a new task"""
+        def _create():
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+
+            task = serializer.save(status='pending')
+            routers.pin_to_primary(request, [task.id])
+
+            return Response(
+                TaskSerializer(task).data,
+                status=status.HTTP_201_CREATED
+            )
+
+        return self._idempotent(request, 'task-create', _create)
+
+    def _idempotent(self, request, scope, handler):
+        """Run `handler` at most once per Idempotency-Key within `scope`.
+
+        Retries with a finished key replay the stored response; retries
+        while the original is still running get 409 with Retry-After
+        instead of holding a worker. Failed requests (4xx/5xx) release the
+        key rather than storing the failure, so a retry runs again; so do
+        responses the handler marks `replayable = False`.
+        """
+        key = idempotency.get_key(request)
+        if not key:
+            return handler()
+
+        request_hash = idempotency.fingerprint(request)
+        record, created = idempotency.begin(key, scope, request_hash)
+
+        if record is None:
+            return Response(
+                {'error': 'Previous request with this Idempotency-Key failed; retry it'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'}
+            )
+        if not created:
+            if record.request_hash != request_hash:
+                return Response(
+                    {'error': 'Idempotency-Key was already used with a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status != 'completed':
+                logger.info(f"Idempotency-Key {key} in flight for {scope}, asking client to retry")
+                return Response(
+                    {'error': 'Original request with this Idempotency-Key is still in progress'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': str(idempotency.retry_after())}
+                )
+            return Response(
+                record.response_body,
+                status=record.response_status,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
+        try:
+            response = handler()
+        except Exception:
+            idempotency.release(record)
+            raise
+
+        if response.status_code >= 400 or not getattr(response, 'replayable', True):
+            idempotency.release(record)
+        else:
+            idempotency.complete(record, response.status_code, response.data)
+        return response
+
+    def _run_phase(self, request, phase_name, phase_func, label, done_status=None):
+        """Run one pipeline phase for this task and return the refreshed task.
+
+        Only a response for a phase that reached `done_status` (default
+        `<phase>_done`) is stored for replay; a failed phase, or one still
+        running when the wait times out, releases the Idempotency-Key.
+        """
+        done_status = done_status or f"{phase_name}_done"
+        task = self.get_object()
+        routers.pin_to_primary(request, [task.id])
+
+        def _run():
+            try:
+                profile = request.query_params.get('profile', '').lower() in ('1', 'true', 'yes')
+                if not connection.in_atomic_block:
+                    # Hand the connection back while the phase thread waits on the LLM
+                    connection.close()
+                run_phase_in_thread(phase_func, task.id, profile=profile)
+
+                task.refresh_from_db()
+                response = Response(
+                    {'status': 'success', 'data': TaskSerializer(task).data},
+                    status=status.HTTP_200_OK
+                )
+                # Failures and phases outliving the wait both show up in the task status
+                response.replayable = task.status == done_status
+                return response
+            except Exception as e:
+                logger.error(f"{label} error: {e}")
+                task.status = 'error'
+                task.error_message = str(e)
+                task.save()
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        return self._idempotent(request, f"task:{task.id}:{phase_name}", _run)
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Create many tasks at once, optionally queueing full pipeline runs"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        task = serializer.save(status='pending')
-        
+        items = serializer.validated_data['tasks']
+        run_pipeline = serializer.validated_data['run_pipeline']
+
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(
+                [Task(status='pending', **item) for item in items],
+                batch_size=200,
+            )
+            task_ids = [t.id for t in tasks]
+            if run_pipeline:
+                # Worker threads must only start once the rows are visible
+                transaction.on_commit(lambda: schedule_pipeline_runs(task_ids))
+
+        routers.pin_to_primary(request, task_ids)
+        logger.info(f"Batch created {len(task_ids)} tasks (run_pipeline={run_pipeline})")
         return Response(
-            TaskSerializer(task).data,
+            {'count': len(task_ids), 'task_ids': task_ids, 'pipeline_scheduled': run_pipeline},
             status=status.HTTP_201_CREATED
         )
-    
+
     @action(detail=True, methods=['post'])
     def phase1(self, request, pk=None):
         """Run Phase 1: Vendor Discovery"""
-        task = self.get_object()
-        try:
-            run_phase_in_thread(run_phase1, task.id)
-            
-            task.refresh_from_db()
-            return Response(
-                {'status': 'success', 'data': TaskSerializer(task).data},
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            logger.error(f"Phase 1 error: {e}")
-            task.status = 'error'
-            task.error_message = str(e)
-            task.save()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._run_phase(request, 'phase1', run_phase1, 'Phase 1')
     
     @action(detail=True, methods=['post'])
     def phase2(self, request, pk=None):
         """Run Phase 2: Timeline Analysis"""
-        task = self.get_object()
-        try:
-            run_phase_in_thread(run_phase2, task.id)
-            
-            task.refresh_from_db()
-            return Response(
-                {'status': 'success', 'data': TaskSerializer(task).data},
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            logger.error(f"Phase 2 error: {e}")
-            task.status = 'error'
-            task.error_message = str(e)
-            task.save()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._run_phase(request, 'phase2', run_phase2, 'Phase 2')
     
     @action(detail=True, methods=['post'])
     def phase3(self, request, pk=None):
         """Run Phase 3: Subtask Decomposition"""
-        task = self.get_object()
-        try:
-            run_phase_in_thread(run_phase3, task.id)
-            
-            task.refresh_from_db()
-            return Response(
-                {'status': 'success', 'data': TaskSerializer(task).data},
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            logger.error(f"Phase 3 error: {e}")
-            task.status = 'error'
-            task.error_message = str(e)
-            task.save()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._run_phase(request, 'phase3', run_phase3, 'Phase 3')
     
     @action(detail=True, methods=['post'])
     def phase4(self, request, pk=None):
         """Run Phase 4: Capability Mapping"""
-        task = self.get_object()
-        try:
-            run_phase_in_thread(run_phase4, task.id)
-            
-            task.refresh_from_db()
-            return Response(
-                {'status': 'success', 'data': TaskSerializer(task).data},
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            logger.error(f"Phase 4 error: {e}")
-            task.status = 'error'
-            task.error_message = str(e)
-            task.save()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._run_phase(request, 'phase4', run_phase4, 'Phase 4')
     
     @action(detail=True, methods=['post'])
     def phase5(self, request, pk=None):
         """Run Phase 5: Final Calculation"""
-        task = self.get_object()
-        try:
-            run_phase_in_thread(run_phase5, task.id)
-            
-            task.refresh_from_db()
-            return Response(
-                {'status': 'success', 'data': TaskSerializer(task).data},
-                status=status.HTTP_200_OK
-            )
-        except Exception as e:
-            logger.error(f"Phase 5 error: {e}")
-            task.status = 'error'
-            task.error_message = str(e)
-            task.save()
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._run_phase(request, 'phase5', run_phase5, 'Phase 5', done_status='completed')
     
     @action(detail=True, methods=['get'])
     def report(self, request, pk=None):
         """Get final report for completed task"""
-        task = self.get_object()
-        
         try:
-            analysis = FinalAnalysis.objects.get(task_id=task.id)
-            return Response({
+            row = Task.objects.filter(pk=pk).values_list(
+                'id', 'updated_at', 'final_analysis__updated_at'
+            ).first()
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            doc = archiver.get_archive(pk) if str(pk).isdigit() else None
+            if doc is None:
+                self.get_object()  # raises 404 for unknown tasks
+            return Response(archiver.report_from_archive(doc), headers={'X-Archived': 'true'})
+        task_id, task_updated_at, analysis_updated_at = row
+
+        if analysis_updated_at is None:
+            return Response(
+                {'error': 'Analysis not completed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        version = report_cache.report_version(task_id, analysis_updated_at, task_updated_at)
+        last_modified = report_cache.report_last_modified(analysis_updated_at, task_updated_at)
+
+        not_modified = get_conditional_response(
+            request, etag=report_cache.report_etag(version), last_modified=last_modified
+        )
+        if not_modified is not None:
+            return report_cache.apply_cache_headers(not_modified, version, last_modified)
+
+        payload = report_cache.get_cached_report(task_id, version)
+        if payload is None:
+            try:
+                analysis = FinalAnalysis.objects.select_related('task', 'best_vendor').get(task_id=task_id)
+            except FinalAnalysis.DoesNotExist:
+                return Response(
+                    {'error': 'Analysis not completed'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            task = analysis.task
+            payload = {
                 'task_id': task.id,
                 'task_description': task.task_description,
                 'status': task.status,
@@ -189,14 +337,43 @@ class TaskViewSet(viewsets.ModelViewSet):
                 'rpi_score': analysis.rpi_score,
                 'recommendations': analysis.recommendations,
                 'best_vendor': analysis.best_vendor.vendor_name if analysis.best_vendor else None,
-            })
-        except FinalAnalysis.DoesNotExist:
+            }
+            report_cache.set_cached_report(task_id, version, payload)
+
+        return report_cache.apply_cache_headers(Response(payload), version, last_modified)
+
+    @action(detail=False, methods=['get'], url_path=r'archive/(?P<task_id>\d+)')
+    def archive(self, request, task_id=None):
+        """Full stored document of an archived task (decompressed on every read)"""
+        doc = archiver.get_archive(task_id)
+        if doc is None:
+            return Response({'error': 'Archived task not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(doc)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all tasks with vendors, mappings and final analyses (ndjson/csv/parquet)"""
+        # `format` is reserved by DRF for renderer selection, hence `output`
+        fmt = request.query_params.get('output', 'ndjson').lower()
+        if fmt not in EXPORT_FORMATS:
             return Response(
-                {'error': 'Analysis not completed'},
+                {'error': f"Unsupported output '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            chunk_size = max(1, min(int(request.query_params.get('chunk_size', DEFAULT_CHUNK_SIZE)), 5000))
+        except ValueError:
+            chunk_size = DEFAULT_CHUNK_SIZE
 
-class VendorViewSet(viewsets.ReadOnlyModelViewSet):
+        response = StreamingHttpResponse(
+            stream_export(fmt, status=request.query_params.get('status'), chunk_size=chunk_size),
+            content_type=CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="vendor_pipeline_results.{fmt}"'
+        return response
+
+@pipeline_transactions
+class VendorViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Vendor API ViewSet - List and retrieve vendors"""
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
@@ -208,7 +385,8 @@ class VendorViewSet(viewsets.ReadOnlyModelViewSet):
             return Vendor.objects.filter(task_id=task_id)
         return Vendor.objects.all()
 
-class SubtaskViewSet(viewsets.ReadOnlyModelViewSet):
+@pipeline_transactions
+class SubtaskViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Subtask API ViewSet - List and retrieve subtasks"""
     queryset = Subtask.objects.all()
     serializer_class = SubtaskSerializer
@@ -218,4 +396,19 @@ class SubtaskViewSet(viewsets.ReadOnlyModelViewSet):
         task_id = self.request.query_params.get('task_id')
         if task_id:
             return Subtask.objects.filter(task_id=task_id)
-        return Subtask.objects.all()
\ No newline at end of file
+        return Subtask.objects.all()
+
+@pipeline_transactions
+class ValidationLogViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """Validation events recorded by the phases; filter with ?task_id=, ?phase=, ?status="""
+    queryset = ValidationLog.objects.all()
+    serializer_class = ValidationLogSerializer
+    pagination_class = PageNumberPagination
+
+    def get_queryset(self):
+        qs = ValidationLog.objects.order_by('-created_at', '-id')
+        for param in ('task_id', 'phase', 'status', 'validation_type'):
+            value = self.request.query_params.get(param)
+            if value:
+                qs = qs.filter(**{param: value})
+        return qs
@@ -0,0 +1,168 @@
+"""
+Logging helpers: non-blocking queue handlers, JSON output and filters
+that keep debug and SQL logging from scaling with the amount of work done.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'log_route'}
+
+_listener = None
+_install_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as top-level keys."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DebugThrottleFilter(logging.Filter):
+    """Sample and rate-limit DEBUG records; INFO and above always pass.
+
+    `sample_rate` keeps that fraction of DEBUG records. `max_per_second`
+    caps DEBUG records per call site (file:line) per second.
+    """
+
+    def __init__(self, sample_rate=1.0, max_per_second=0):
+        super().__init__()
+        self.sample_rate = float(sample_rate)
+        self.max_per_second = int(max_per_second)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        # One decision per record, so handlers sharing this filter agree
+        decision = getattr(record, '_debug_throttle', None)
+        if decision is None:
+            decision = self._decide(record)
+            record._debug_throttle = decision
+        return decision
+
+    def _decide(self, record):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = int(time.monotonic())
+        with self._lock:
+            second, count = self._windows.get(key, (now, 0))
+            if second != now:
+                second, count = now, 0
+            count += 1
+            self._windows[key] = (second, count)
+        return count <= self.max_per_second
+
+
+class SlowQueryFilter(logging.Filter):
+    """Pass `django.db.backends` records only when the query took at least `threshold_ms`."""
+
+    def __init__(self, threshold_ms=200):
+        super().__init__()
+        self.threshold = float(threshold_ms) / 1000.0
+
+    def filter(self, record):
+        duration = getattr(record, 'duration', None)
+        return duration is None or duration >= self.threshold
+
+
+class _RoutingQueueHandler(QueueHandler):
+    """Enqueue records for one target handler; filtering happens here, on the caller's thread."""
+
+    def __init__(self, log_queue, route):
+        super().__init__(log_queue)
+        self.route = route
+
+    def prepare(self, record):
+        # Same-process queue: keep exc_info so the target formatter can render it
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.log_route = self.route
+        return record
+
+
+class _RoutingQueueListener(QueueListener):
+    """Single background thread that writes every queued record to its target handler."""
+
+    def __init__(self, log_queue, targets):
+        super().__init__(log_queue)
+        self.targets = targets
+
+    def handle(self, record):
+        handler = self.targets.get(getattr(record, 'log_route', None))
+        if handler is not None:
+            handler.handle(record)
+
+
+def install_queue_logging():
+    """Move every configured handler behind a queue drained by one listener thread.
+
+    Levels and filters move to the queue-side handler so dropped records
+    never get enqueued. Safe to call more than once.
+    """
+    global _listener
+    with _install_lock:
+        if _listener is not None:
+            return _listener
+
+        log_queue = queue.SimpleQueue()
+        targets = {}
+        wrappers = {}
+        loggers = [logging.getLogger()] + [
+            lg for lg in logging.root.manager.loggerDict.values() if isinstance(lg, logging.Logger)
+        ]
+        for lg in loggers:
+            for handler in list(lg.handlers):
+                if isinstance(handler, QueueHandler):
+                    continue
+                route = id(handler)
+                wrapper = wrappers.get(route)
+                if wrapper is None:
+                    wrapper = _RoutingQueueHandler(log_queue, route)
+                    wrapper.setLevel(handler.level)
+                    wrapper.filters = handler.filters
+                    handler.filters = []
+                    wrappers[route] = wrapper
+                    targets[route] = handler
+                lg.removeHandler(handler)
+                lg.addHandler(wrapper)
+
+        _listener = _RoutingQueueListener(log_queue, targets)
+        _listener.start()
+        atexit.register(stop_queue_logging)
+        return _listener
+
+
+def stop_queue_logging():
+    """Flush queued records and stop the listener thread"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()